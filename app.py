@@ -1,61 +1,164 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, url_for, g
+import cProfile
 import os
+import re
+import sys
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from tempfile import SpooledTemporaryFile
 from flask_cors import CORS
 
-from core.file_loader import load_file
-from core.text_cleaner import clean_text
-from core.question_parser import extract_questions
-from core.output_formatter import format_output
+from config import (
+    QUESTION_STORE_MAX_LIMIT,
+    UPLOAD_SPILL_BYTES,
+    BATCH_MAX_WORKERS,
+    BATCH_MAX_FILES,
+    BATCH_TIME_BUDGET_SECONDS,
+    METRICS_TIMING_HEADERS,
+    PROFILE_REQUESTS,
+    PROFILE_DIR,
+)
+from core.extractors import UnsupportedFormatError, detect_extractor
+from core.pipeline import extract_file, stream_file, result_cache
+from core.job_queue import JobQueue, QueueFullError
+from core.question_store import QuestionStore
+from utils import metrics
+from utils.logger import logger
+
+
+class UploadRequest(Request):
+    """
+    Keep multipart uploads in memory up to UPLOAD_SPILL_BYTES
+    (werkzeug's default spools anything over 500 KB to disk)
+    """
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None,
+        content_length=None
+    ):
+        return SpooledTemporaryFile(max_size=UPLOAD_SPILL_BYTES, mode="rb+")
+
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
 UPLOAD_FOLDER = "uploads"
+NDJSON_MIMETYPE = "application/x-ndjson"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+job_queue = JobQueue()
+batch_pool = ThreadPoolExecutor(
+    max_workers=BATCH_MAX_WORKERS, thread_name_prefix="extract-batch"
+)
+question_store = QuestionStore()
+
+
+@app.before_request
+def start_request_metrics():
+    # per-request stage timings (Server-Timing / NDJSON summary)
+    g.metrics = metrics.RequestMetrics()
+    g.metrics.start()
+
+    # ?profile=1: cProfile this one request (request thread only)
+    g.profiler = None
+    if PROFILE_REQUESTS and request.args.get("profile") == "1":
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def finish_request_metrics(response):
+    recorder = g.get("metrics")
+    if recorder is None:
+        return response
+
+    if g.profiler is not None:
+        g.profiler.disable()
+        response.headers["X-Profile"] = _dump_profile(g.profiler)
+
+    if METRICS_TIMING_HEADERS or request.args.get("timing") == "1":
+        response.headers["Server-Timing"] = recorder.server_timing()
+        response.headers["X-Pipeline-Counts"] = ", ".join(
+            f"{item}={value}" for item, value in recorder.counts.items()
+        )
+
+    metrics.record_http(
+        request.url_rule.rule if request.url_rule else "unmatched",
+        request.method, response.status_code, recorder.elapsed()
+    )
+    return response
+
+
+@app.teardown_request
+def stop_request_metrics(exc):
+    recorder = g.pop("metrics", None)
+    if recorder is not None:
+        recorder.stop()
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_api():
+    # Prometheus text format; numbers are per process (gunicorn worker)
+    caches = {"results": result_cache.stats()}
+    # the OCR backend (OpenCV) is only imported once an image shows up
+    image_reader = sys.modules.get("ocr.image_reader")
+    if image_reader is not None:
+        caches["ocr"] = image_reader.ocr_cache.stats()
+    extra = [
+        (name, kind, help_text, {
+            (("cache", cache),): stats[stat] for cache, stats in caches.items()
+        })
+        for name, kind, help_text, stat in [
+            ("cache_hits_total", "counter", "Cache lookups that hit", "hits"),
+            ("cache_misses_total", "counter", "Cache lookups that missed",
+             "misses"),
+            ("cache_memory_entries", "gauge", "Entries in the memory tier",
+             "memory_entries"),
+        ]
+    ]
+
+    return app.response_class(
+        metrics.render_prometheus(extra),
+        mimetype="text/plain; version=0.0.4"
+    )
+
 
 @app.route("/extract-questions", methods=["POST"])
 def extract_questions_api():
-    # 1️⃣ File validation
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
+    # 1️⃣ File validation (and optional pages / max_questions)
+    file, error = _get_upload()
+    if error:
+        return error
+    options, error = _extraction_options()
+    if error:
+        return error
 
-    file = request.files["file"]
-    if not file or file.filename.strip() == "":
-        return jsonify({"error": "Empty filename"}), 400
+    # 2️⃣ Keep the upload in memory (large ones spill to a temp file)
+    file_path = _read_upload(file)
 
-    # 2️⃣ Save uploaded file with unique name
-    ext = os.path.splitext(file.filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(file_path)
+    # NDJSON mode: ?stream=1 or Accept: application/x-ndjson
+    if _wants_ndjson():
+        return _stream_questions(file_path, file.filename, options)
 
     try:
-        # 3️⃣ Run extraction pipeline
-        raw_text = load_file(file_path)
-        cleaned_text = clean_text(raw_text)
-        questions = extract_questions(cleaned_text)
-
-        formatted_questions = []
-
-        for q in questions:
-            formatted_questions.append(
-                format_output(
-                    question=q.get("question"),
-                    q_type=q.get("type", "unknown"),
-                    difficulty=q.get("difficulty", "unknown"),
-                    source=file.filename,
-                    options=q.get("options", {}),
-                    answer=q.get("answer")
-                )
-            )
+        # 3️⃣ Run extraction pipeline (cached on file content)
+        formatted_questions, cache_hit = extract_file(
+            file_path, source=file.filename, **options
+        )
 
         # 4️⃣ Success response
-        return jsonify({
+        response = jsonify({
             "total": len(formatted_questions),
+            "cache": "hit" if cache_hit else "miss",
             "questions": formatted_questions
         })
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+        return response
+
+    except UnsupportedFormatError as e:
+        return _unsupported(e)
 
     except Exception as e:
         # 5️⃣ Error handling
@@ -65,11 +168,409 @@ def extract_questions_api():
         }), 500
 
     finally:
-        # 6️⃣ Optional: cleanup uploaded file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # 6️⃣ Cleanup a spilled upload
+        _remove_spilled(file_path)
+
+
+@app.route("/extract-questions/batch", methods=["POST"])
+def extract_batch_api():
+    # 1️⃣ File validation: every "files" (or "file") part of the form
+    uploads = [
+        file for file in
+        request.files.getlist("files") + request.files.getlist("file")
+        if file and file.filename.strip()
+    ]
+    if not uploads:
+        return jsonify({"error": "No file uploaded"}), 400
+    if len(uploads) > BATCH_MAX_FILES:
+        return jsonify({
+            "error": f"Too many files ({len(uploads)} > {BATCH_MAX_FILES})"
+        }), 413
+    options, error = _extraction_options()
+    if error:
+        return error
+
+    start = time.perf_counter()
+
+    # 2️⃣ Read uploads and queue them on the shared batch pool; per-file
+    # PDF / OCR pools split the cores between concurrent files
+    workers = max(1, (os.cpu_count() or 1) // BATCH_MAX_WORKERS)
+    futures = {}
+    spilled = {}
+    for file in uploads:
+        key = _unique_key(file.filename, futures)
+        file_path = _read_upload(file)
+        spilled[key] = file_path
+        futures[key] = batch_pool.submit(
+            _extract_batch_file, file_path, file.filename, workers, options
+        )
+
+    # 3️⃣ Wait within the time budget
+    wait(futures.values(), timeout=BATCH_TIME_BUDGET_SECONDS)
+
+    # 4️⃣ Per-file results and errors, keyed by upload filename
+    results = {}
+    for key, future in futures.items():
+        if future.done():
+            results[key] = future.result()
+            continue
+
+        # a running extraction can't be interrupted: it finishes in the
+        # background (and fills the result cache), its result is dropped
+        if future.cancel():
+            _remove_spilled(spilled[key])
+        results[key] = {
+            "error": "Time budget exceeded",
+            "details": f"not finished within {BATCH_TIME_BUDGET_SECONDS}s"
+        }
+
+    failed = sum(1 for result in results.values() if "error" in result)
+    return jsonify({
+        "files": results,
+        "total": sum(
+            result["total"] for result in results.values()
+            if "error" not in result
+        ),
+        "errors": failed,
+        "seconds": round(time.perf_counter() - start, 4)
+    })
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job_api():
+    # 1️⃣ File validation (and optional pages / max_questions)
+    file, error = _get_upload()
+    if error:
+        return error
+    options, error = _extraction_options()
+    if error:
+        return error
+
+    # 2️⃣ Read upload (large ones spill); the job deletes a spilled file
+    file_path = _read_upload(file)
+
+    # 3️⃣ Reject unknown formats now rather than in a failed job
+    try:
+        detect_extractor(file_path, file.filename)
+    except UnsupportedFormatError as e:
+        _remove_spilled(file_path)
+        return _unsupported(e)
+
+    # 4️⃣ Queue extraction and return immediately
+    try:
+        job_id = job_queue.submit(file_path, source=file.filename, **options)
+    except QueueFullError as e:
+        _remove_spilled(file_path)
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": url_for("job_status_api", job_id=job_id),
+        "result_url": url_for("job_result_api", job_id=job_id)
+    }), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status_api(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    job.pop("result")
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result_api(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    if job["status"] == "failed":
+        return jsonify({
+            "error": "Failed to process file",
+            "details": job["error"]
+        }), 500
+
+    if job["status"] != "done":
+        return jsonify({
+            "status": job["status"],
+            "progress": job["progress"]
+        }), 202
+
+    return jsonify({
+        "total": len(job["result"]),
+        "cache": job["cache"],
+        "questions": job["result"]
+    })
+
+
+@app.route("/questions", methods=["GET"])
+def search_questions_api():
+    # 1️⃣ Query params: ?q=photosynthesis&type=MCQ&source=a.pdf&source=b.pdf
+    try:
+        limit = int(request.args.get("limit", 50))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    limit = max(0, min(limit, QUESTION_STORE_MAX_LIMIT))
+    offset = max(0, offset)
+
+    filters = {
+        "text": request.args.get("q"),
+        "q_type": request.args.get("type"),
+        "difficulty": request.args.get("difficulty"),
+        "sources": request.args.getlist("source"),
+    }
+
+    # 2️⃣ Indexed lookup in the question store
+    questions = question_store.search(**filters, limit=limit, offset=offset)
+
+    return jsonify({
+        "total": question_store.count(**filters),
+        "limit": limit,
+        "offset": offset,
+        "questions": questions
+    })
+
+
+# ================= HELPERS ================= #
+
+def _get_upload():
+    """
+    Return (file, None) or (None, error response)
+    """
+    if "file" not in request.files:
+        return None, (jsonify({"error": "No file uploaded"}), 400)
+
+    file = request.files["file"]
+    if not file or file.filename.strip() == "":
+        return None, (jsonify({"error": "Empty filename"}), 400)
+
+    return file, None
+
+
+def _extraction_options():
+    """
+    Return (pipeline options, None) or (None, error response) from the
+    optional `pages` ("3", "2-5" or "5-", 1-based) and `max_questions`
+    query / form parameters
+    """
+    options = {}
+
+    pages = request.values.get("pages", "").strip()
+    if pages:
+        options["pages"] = _parse_pages(pages)
+        if options["pages"] is None:
+            return None, (jsonify({
+                "error": "Invalid pages",
+                "details": "expected N, N-M or N- (1-based, N <= M)"
+            }), 400)
+
+    max_questions = request.values.get("max_questions", "").strip()
+    if max_questions:
+        if not (max_questions.isascii() and max_questions.isdigit()) \
+                or int(max_questions) < 1:
+            return None, (jsonify({
+                "error": "Invalid max_questions",
+                "details": "expected a positive integer"
+            }), 400)
+        options["max_questions"] = int(max_questions)
+
+    return options, None
+
+
+def _parse_pages(value: str) -> range | None:
+    """
+    "3", "2-5" or "5-" (1-based, inclusive) as a 0-based range
+    """
+    match = re.fullmatch(r"(\d+)(?:\s*-\s*(\d*))?", value)
+    if not match:
+        return None
+
+    first, last = match.groups()
+    first = int(first)
+    if last is None:
+        last = first
+    else:
+        last = int(last) if last else sys.maxsize
+
+    if first < 1 or last < first:
+        return None
+    return range(first - 1, last)
+
+
+def _read_upload(file) -> str | bytes:
+    """
+    Upload contents as bytes, or a temp file path above UPLOAD_SPILL_BYTES
+    """
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+
+    if size <= UPLOAD_SPILL_BYTES:
+        return file.read()
+
+    return _save_upload(file)
+
+
+def _extract_batch_file(
+    file_path: str | bytes,
+    source: str,
+    workers: int,
+    options: dict
+) -> dict:
+    """
+    Batch worker: one file through the pipeline, errors reported, never raised
+    """
+    start = time.perf_counter()
+
+    try:
+        questions, cache_hit = extract_file(
+            file_path, source=source, workers=workers, **options
+        )
+        return {
+            "total": len(questions),
+            "cache": "hit" if cache_hit else "miss",
+            "seconds": round(time.perf_counter() - start, 4),
+            "questions": questions
+        }
+
+    except UnsupportedFormatError as e:
+        return {"error": "Unsupported file type", "details": str(e)}
+
+    except Exception as e:
+        return {"error": "Failed to process file", "details": str(e)}
+
+    finally:
+        _remove_spilled(file_path)
+
+
+def _unique_key(filename: str, taken) -> str:
+    """
+    `filename`, or "name (2).ext" etc. when the batch repeats a filename
+    """
+    if filename not in taken:
+        return filename
+
+    stem, ext = os.path.splitext(filename)
+    n = 2
+    while f"{stem} ({n}){ext}" in taken:
+        n += 1
+    return f"{stem} ({n}){ext}"
+
+
+def _wants_ndjson() -> bool:
+    if request.args.get("stream", "").lower() in ("1", "true", "ndjson"):
+        return True
+
+    best = request.accept_mimetypes.best_match(
+        ["application/json", NDJSON_MIMETYPE]
+    )
+    return best == NDJSON_MIMETYPE
+
+
+def _stream_questions(file_path: str | bytes, source: str, options: dict):
+    """
+    One JSON line per question as soon as it is formatted, then a
+    {"summary": ...} line (or {"error": ...} if extraction fails midway)
+    """
+    start = time.perf_counter()
+
+    # pull the first question up front: a file that fails straight away
+    # still gets a proper 500 instead of a broken 200 stream
+    try:
+        questions, cache_hit = stream_file(file_path, source=source, **options)
+        first = next(questions, None)
+    except UnsupportedFormatError as e:
+        _remove_spilled(file_path)
+        return _unsupported(e)
+    except Exception as e:
+        _remove_spilled(file_path)
+        return jsonify({
+            "error": "Failed to process file",
+            "details": str(e)
+        }), 500
+
+    first_seconds = time.perf_counter() - start
+
+    recorder = g.metrics
+    timing = METRICS_TIMING_HEADERS or request.args.get("timing") == "1"
+
+    def generate():
+        total = 0
+        # the body runs after the request hooks: collect stage timings here
+        recorder.start()
+        try:
+            if first is not None:
+                total += 1
+                yield app.json.dumps(first) + "\n"
+
+            for q in questions:
+                total += 1
+                yield app.json.dumps(q) + "\n"
+
+            summary = {
+                "total": total,
+                "cache": "hit" if cache_hit else "miss",
+                "first_question_seconds": round(first_seconds, 4),
+                "seconds": round(time.perf_counter() - start, 4),
+            }
+            if timing:
+                summary["timing"] = recorder.as_dict()
+            yield app.json.dumps({"summary": summary}) + "\n"
+        except Exception as e:
+            yield app.json.dumps({
+                "error": "Failed to process file",
+                "details": str(e),
+                "total": total,
+            }) + "\n"
+        finally:
+            # also runs when the client disconnects mid-stream
+            recorder.stop()
+            _remove_spilled(file_path)
+
+    response = app.response_class(generate(), mimetype=NDJSON_MIMETYPE)
+    response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+    # keep reverse proxies (nginx) from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _unsupported(e: UnsupportedFormatError):
+    return jsonify({"error": "Unsupported file type", "details": str(e)}), 415
+
+
+def _dump_profile(profiler: cProfile.Profile) -> str:
+    """
+    Write a pstats file to PROFILE_DIR, return its name
+    (load with `python -m pstats` or snakeviz)
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-"
+        f"{uuid.uuid4().hex[:8]}.prof"
+    )
+    path = os.path.join(PROFILE_DIR, name)
+    profiler.dump_stats(path)
+    logger.info(f"Request profile written to {path}")
+    return name
+
+
+def _remove_spilled(file_path: str | bytes):
+    if isinstance(file_path, str) and os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def _save_upload(file) -> str:
+    ext = os.path.splitext(file.filename)[1]
+    filename = f"{uuid.uuid4()}{ext}"
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(file_path)
+    return file_path
 
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
-
@@ -0,0 +1,591 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline benchmark on a synthetic question-paper corpus.
+
+1. Deterministic papers are generated per kind (txt, docx, xlsx, png)
+   with a configurable question count, MCQ / True-False mix and OCR-style
+   noise.
+2. Every paper goes through each stage on its own (load, clean, parse,
+   format, save; png also times decode + _preprocess_image) and through
+   the streamed pipeline end to end. Result and OCR caches are bypassed.
+3. Per kind and stage: p50 / p95 / mean latency, throughput (papers/s,
+   questions/s, MB/s end to end) and peak RSS are reported and written
+   as JSON. Each kind runs in a fresh interpreter and its peak RSS is
+   read from VmHWM, reset right before the first paper (ru_maxrss would
+   carry the parent's peak over into the child), so it is the kind's
+   own; "over_baseline" is that peak minus the RSS at the reset.
+   --compare flags stages whose p50 got slower, and kinds whose peak RSS
+   over the baseline grew, by more than --threshold against a previous
+   run (exit code 1).
+
+Without a working tesseract, png papers are only timed for preprocessing.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline [--questions 300] [--papers 3]
+    python -m benchmarks.bench_pipeline -o output/new.json \
+        --compare output/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytesseract
+from docx import Document
+
+from config import SCORING_BATCH_SIZE
+from core.file_loader import load_file
+from core.pipeline import (
+    iter_formatted_questions, _format_batch, PIPELINE_FINGERPRINT
+)
+from core.question_parser import extract_questions
+from core.text_cleaner import clean_text
+from dataset_builder import DatasetWriter
+from ocr import image_reader
+from utils.cache import ResultCache
+from utils.logger import logger
+
+
+KINDS = ["txt", "docx", "xlsx", "png"]
+STAGES = ["load", "preprocess", "clean", "parse", "format", "save", "end_to_end"]
+
+# regressions smaller than this are timer / allocator noise
+MIN_REGRESSION_SECONDS = 0.001
+MIN_REGRESSION_MB = 5.0
+
+
+# ================= CORPUS ================= #
+
+_WORDS = (
+    "what which explain the of a cell energy photosynthesis plant water "
+    "light process define compare list state why how river force motion "
+    "acid base metal carbon oxygen current voltage"
+).split()
+
+# OCR-style character confusions
+_CONFUSIONS = {"l": "1", "O": "0", "o": "0", "m": "rn", "e": "c", "S": "5"}
+
+
+def make_paper(
+    questions: int,
+    mcq_ratio: float = 0.7,
+    noise: float = 0.05,
+    seed: int = 0
+) -> list:
+    """
+    Lines of a deterministic exam paper: numbered MCQ and True / False
+    questions with answers, section headers and page numbers; `noise` is
+    the share of lines that get OCR-style damage
+    """
+    rng = random.Random(seed)
+    lines = ["SAMPLE QUESTION PAPER", "SECTION A", ""]
+
+    for n in range(1, questions + 1):
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 16)))
+
+        if rng.random() < mcq_ratio:
+            block = [
+                f"Q{n}. {sentence.capitalize()}?",
+                "   ".join(
+                    f"{key}) {rng.choice(_WORDS)}" for key in "ABCD"
+                ),
+                f"Answer: {rng.choice('ABCD')}",
+            ]
+        else:
+            block = [
+                f"Q{n}. {sentence.capitalize()}. True / False",
+                f"Answer: {rng.choice(['True', 'False'])}",
+            ]
+
+        lines.extend(_add_noise(line, noise, rng) for line in block)
+        lines.append("")
+
+        if n % 12 == 0:
+            lines.append(f"Page {n // 12}")
+            lines.append("")
+
+    return lines
+
+
+def write_paper(kind: str, lines: list, path: str, noise: float = 0.05):
+    """
+    Write paper lines as a .txt / .docx / .xlsx file or a rendered .png
+    """
+    if kind == "txt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    elif kind == "docx":
+        document = Document()
+        for line in lines:
+            document.add_paragraph(line)
+        document.save(path)
+
+    elif kind == "xlsx":
+        pd.DataFrame({"text": lines}).to_excel(path, index=False)
+
+    elif kind == "png":
+        cv2.imwrite(path, render_page(lines, noise))
+
+    else:
+        raise ValueError(f"Unknown kind: {kind}")
+
+
+def render_page(lines: list, noise: float = 0.05, seed: int = 0):
+    """
+    Black-on-white scan of the lines with blur and salt-and-pepper specks
+    """
+    line_height = 28
+    image = np.full(
+        (line_height * (len(lines) + 2), 1700, 3), 255, dtype=np.uint8
+    )
+
+    for i, line in enumerate(lines, 1):
+        cv2.putText(
+            image, line, (40, i * line_height), cv2.FONT_HERSHEY_SIMPLEX,
+            0.6, (0, 0, 0), 1, cv2.LINE_AA
+        )
+
+    if noise:
+        image = cv2.GaussianBlur(image, (3, 3), 0)
+        rng = np.random.default_rng(seed)
+        specks = rng.random(image.shape[:2]) < noise / 10
+        image[specks] = rng.choice([0, 255], size=(int(specks.sum()), 1))
+
+    return image
+
+
+def make_corpus(
+    directory: str,
+    kinds: list,
+    papers: int,
+    questions: int,
+    image_questions: int,
+    mcq_ratio: float,
+    noise: float,
+    seed: int
+) -> dict:
+    """
+    {kind: [paper paths]} written into `directory`
+    """
+    corpus = {}
+    for kind in kinds:
+        count = image_questions if kind == "png" else questions
+        corpus[kind] = []
+        for i in range(papers):
+            path = os.path.join(directory, f"paper_{i:03d}.{kind}")
+            lines = make_paper(count, mcq_ratio, noise, seed=seed + i)
+            write_paper(kind, lines, path, noise)
+            corpus[kind].append(path)
+    return corpus
+
+
+def _add_noise(line: str, noise: float, rng: random.Random) -> str:
+    if rng.random() >= noise:
+        return line
+
+    chars = list(line)
+    for i, char in enumerate(chars):
+        if char in _CONFUSIONS and rng.random() < 0.3:
+            chars[i] = _CONFUSIONS[char]
+    if rng.random() < 0.5:
+        chars.append(" " + rng.choice("•■►") + " " + "." * rng.randint(4, 12))
+    return "".join(chars)
+
+
+# ================= STAGES ================= #
+
+def run_kind(
+    kind: str,
+    paths: list,
+    out_dir: str,
+    ocr: bool,
+    repeat: int
+) -> dict:
+    """
+    Every paper of one kind `repeat` times, summarized; run in a new
+    interpreter so the kind's memory use is measured on its own
+    """
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=get_context("spawn")
+    ) as pool:
+        return pool.submit(
+            _run_kind_worker, kind, paths, out_dir, ocr, repeat
+        ).result()
+
+
+def _run_kind_worker(
+    kind: str,
+    paths: list,
+    out_dir: str,
+    ocr: bool,
+    repeat: int
+) -> dict:
+    _setup_process()
+    # a spawned child starts with its parent's high-water mark
+    reset = _reset_peak_rss()
+    baseline_mb = _rss_mb()
+
+    samples = {stage: [] for stage in STAGES}
+    questions = 0
+    input_bytes = 0
+
+    for _ in range(repeat):
+        for path in paths:
+            timings, found = run_paper(path, kind, out_dir, ocr)
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds)
+            questions += found
+            input_bytes += os.path.getsize(path)
+
+    result = summarize(samples, questions, input_bytes, baseline_mb)
+    result["peak_rss_mb"]["reset"] = reset
+    return result
+
+
+def _setup_process():
+    logger.setLevel(logging.WARNING)
+    # measure real OCR work, not cache lookups
+    image_reader.ocr_cache = ResultCache(max_entries=0)
+
+
+def run_paper(path: str, kind: str, out_dir: str, ocr: bool) -> tuple:
+    """
+    ({stage: seconds}, questions found) for one paper
+    """
+    timings = {}
+
+    if kind == "png":
+        _timed(timings, "preprocess", _preprocess, path)
+        if not ocr:
+            return timings, 0
+
+    raw = _timed(timings, "load", load_file, path)
+    cleaned = _timed(timings, "clean", clean_text, raw)
+    questions = _timed(timings, "parse", extract_questions, cleaned)
+    formatted = _timed(timings, "format", _format_all, questions, path)
+    _timed(timings, "save", _save, formatted, out_dir)
+
+    _timed(timings, "end_to_end", _end_to_end, path, out_dir)
+
+    return timings, len(formatted)
+
+
+def _timed(timings: dict, stage: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    timings[stage] = time.perf_counter() - start
+    return result
+
+
+def _preprocess(path: str):
+    with open(path, "rb") as f:
+        image = image_reader.decode_image_data(f.read())
+    return image_reader._preprocess_image(image)
+
+
+def _format_all(questions: list, source: str) -> list:
+    formatted = []
+    for start in range(0, len(questions), SCORING_BATCH_SIZE):
+        formatted.extend(
+            _format_batch(questions[start:start + SCORING_BATCH_SIZE], source)
+        )
+    return formatted
+
+
+def _save(questions: list, out_dir: str):
+    # an absolute name puts the dataset outside output/
+    with DatasetWriter(os.path.join(out_dir, "bench_dataset.json")) as writer:
+        writer.write(questions)
+
+
+def _end_to_end(path: str, out_dir: str):
+    with DatasetWriter(os.path.join(out_dir, "bench_e2e.json")) as writer:
+        writer.write(iter_formatted_questions(path, os.path.basename(path)))
+
+
+# ================= REPORT ================= #
+
+def summarize(
+    samples: dict,
+    questions: int,
+    input_bytes: int,
+    baseline_mb: float = 0.0
+) -> dict:
+    """
+    Latency percentiles per stage + end-to-end throughput and peak RSS
+    (also over the `baseline_mb` RSS the process started the kind with)
+    for one kind
+    """
+    stages = {
+        stage: _latency(values)
+        for stage, values in samples.items() if values
+    }
+
+    e2e = sum(samples.get("end_to_end", []))
+    runs = len(samples.get("end_to_end", []))
+    throughput = None
+    if e2e:
+        throughput = {
+            "papers_per_s": round(runs / e2e, 3),
+            "questions_per_s": round(questions / e2e, 1),
+            "mb_per_s": round(input_bytes / e2e / 1e6, 3),
+        }
+
+    peak_rss = _peak_rss_mb()
+    peak_rss["over_baseline"] = round(peak_rss["self"] - baseline_mb, 1)
+
+    return {
+        "stages": stages,
+        "throughput": throughput,
+        "questions": questions,
+        "peak_rss_mb": peak_rss,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    (kind, stage, baseline, current, unit) for every stage whose p50 grew
+    by more than `threshold` (relative) and MIN_REGRESSION_SECONDS, and
+    every kind whose peak RSS over its baseline grew by more than
+    `threshold` and MIN_REGRESSION_MB (stage "peak_rss")
+    """
+    regressions = []
+
+    for kind, result in current["kinds"].items():
+        base = baseline.get("kinds", {}).get(kind)
+        if not base:
+            continue
+
+        old = base.get("peak_rss_mb", {}).get("over_baseline")
+        new = result["peak_rss_mb"]["over_baseline"]
+        if (
+            old is not None
+            and new > old * (1 + threshold)
+            and new - old > MIN_REGRESSION_MB
+        ):
+            regressions.append((kind, "peak_rss", old, new, "MB"))
+
+        for stage, latency in result["stages"].items():
+            before = base["stages"].get(stage)
+            if not before:
+                continue
+
+            old, new = before["p50"], latency["p50"]
+            if new > old * (1 + threshold) and new - old > MIN_REGRESSION_SECONDS:
+                regressions.append((kind, stage, old, new, "s"))
+
+    return regressions
+
+
+def _latency(values: list) -> dict:
+    ordered = sorted(values)
+    return {
+        "n": len(ordered),
+        "p50": round(_percentile(ordered, 50), 6),
+        "p95": round(_percentile(ordered, 95), 6),
+        "mean": round(sum(ordered) / len(ordered), 6),
+        "total": round(sum(ordered), 6),
+    }
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _peak_rss_mb() -> dict:
+    """
+    High-water mark since the last _reset_peak_rss: VmHWM on Linux, else
+    ru_maxrss (KB on Linux, bytes on macOS), which can't be reset
+    """
+    unit = 1 if sys.platform == "darwin" else 1024
+    peak = _proc_status_mb("VmHWM")
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6
+
+    return {
+        "self": round(peak, 1),
+        "children": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 1e6,
+            1
+        ),
+    }
+
+
+def _rss_mb() -> float:
+    """
+    Current RSS (the peak so far where /proc isn't available)
+    """
+    rss = _proc_status_mb("VmRSS")
+    return rss if rss is not None else _peak_rss_mb()["self"]
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Set VmHWM back to the current RSS (Linux only); False if not possible
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_mb(field: str) -> float | None:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            match = re.search(rf"^{field}:\s+(\d+) kB", f.read(), re.M)
+    except OSError:
+        return None
+    return int(match.group(1)) * 1024 / 1e6 if match else None
+
+
+def _ocr_available() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_kind(kind: str, result: dict):
+    print(f"{kind} ({result['questions']} questions)")
+    for stage in STAGES:
+        latency = result["stages"].get(stage)
+        if latency:
+            print(
+                f"  {stage:10}: p50 {latency['p50'] * 1000:9.2f} ms, "
+                f"p95 {latency['p95'] * 1000:9.2f} ms, "
+                f"mean {latency['mean'] * 1000:9.2f} ms"
+            )
+    if result["throughput"]:
+        t = result["throughput"]
+        print(
+            f"  throughput: {t['papers_per_s']} papers/s, "
+            f"{t['questions_per_s']} questions/s, {t['mb_per_s']} MB/s"
+        )
+    rss = result["peak_rss_mb"]
+    print(
+        f"  peak RSS  : {rss['self']} MB "
+        f"(+{rss['over_baseline']} MB over the process baseline)"
+    )
+
+
+# ================= RUN ================= #
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    parser.add_argument("--papers", type=int, default=3, help="papers per kind")
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument(
+        "--image-questions", type=int, default=20,
+        help="questions per rendered png page"
+    )
+    parser.add_argument("--mcq-ratio", type=float, default=0.7)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "-o", "--output", default=os.path.join("output", "bench_pipeline.json")
+    )
+    parser.add_argument("--compare", help="previous results JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="relative p50 slowdown that counts as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    for kind in kinds:
+        if kind not in KINDS:
+            parser.error(f"unknown kind: {kind}")
+
+    logger.setLevel(logging.WARNING)
+    ocr = _ocr_available()
+    if "png" in kinds and not ocr:
+        print("tesseract not available: png papers are timed for preprocessing only")
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "pipeline": PIPELINE_FINGERPRINT,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "ocr": ocr,
+            "args": vars(args),
+        },
+        "kinds": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        corpus = make_corpus(
+            tmp, kinds, args.papers, args.questions, args.image_questions,
+            args.mcq_ratio, args.noise, args.seed
+        )
+
+        for kind, paths in corpus.items():
+            result = run_kind(kind, paths, tmp, ocr, args.repeat)
+            results["kinds"][kind] = result
+            _print_kind(kind, result)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    print(f"results written to {args.output}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"no regressions against {args.compare}")
+        return 0
+
+    print(f"REGRESSIONS against {args.compare} (p50, > {args.threshold:.0%}):")
+    for kind, stage, old, new, unit in regressions:
+        if unit == "s":
+            change = f"{old * 1000:.2f} ms -> {new * 1000:.2f} ms"
+        else:
+            change = f"+{old:.1f} MB -> +{new:.1f} MB over baseline"
+        growth = f" ({new / old - 1:+.0%})" if old else ""
+        print(f"  {kind}/{stage}: {change}{growth}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+# benchmarks/bench_question_parser.py
+"""
+Regression check + benchmark for core.question_parser.
+
+1. The regression corpus (benchmarks/corpus/parser_regression.txt) must
+   parse exactly to the golden output next to it, raw and after
+   clean_text.
+2. The current extractor and question-start detector must match the
+   original regex-per-call versions on a synthetic exam dump and on long
+   OCR-style blocks.
+3. All three are timed.
+
+Run from the repo root:
+    python -m benchmarks.bench_question_parser [--pages 500] [--repeat 5]
+    python -m benchmarks.bench_question_parser --update-golden
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from benchmarks.bench_text_cleaner import make_dump
+from core.question_parser import (
+    extract_questions, _format_question, _split_lines
+)
+from core.text_cleaner import clean_text
+from nlp.question_detector import QUESTION_WORDS, question_starts
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+CORPUS = os.path.join(CORPUS_DIR, "parser_regression.txt")
+GOLDEN = os.path.join(CORPUS_DIR, "parser_regression.expected.json")
+
+
+# ================= REFERENCE (original parser) ================= #
+
+def legacy_is_question_start(line: str) -> bool:
+    if not line or len(line) < 6:
+        return False
+
+    line_strip = line.strip()
+    lower = line_strip.lower()
+
+    if re.match(r"^[A-Da-d][\)\.]\s+", line_strip):
+        return False
+    if re.match(r"^(q[\d]+[\.\)])", lower):
+        return True
+    if re.match(r"^\d+[\.\)]\s+", line_strip):
+        return True
+    if line_strip.endswith("?") and len(line_strip.split()) > 3:
+        return True
+
+    return any(lower.startswith(word + " ") for word in QUESTION_WORDS)
+
+
+def legacy_extract_questions(text: str):
+    if not text or not isinstance(text, str):
+        return []
+
+    questions = []
+    current_block = []
+
+    for line in _split_lines(text):
+        if legacy_is_question_start(line):
+            if current_block:
+                q = _legacy_format_question(current_block)
+                if q:
+                    questions.append(q)
+                current_block = []
+            current_block.append(line)
+        elif current_block:
+            current_block.append(line)
+
+    if current_block:
+        q = _legacy_format_question(current_block)
+        if q:
+            questions.append(q)
+
+    return questions
+
+
+def _legacy_format_question(lines: list):
+    block = " ".join(lines)
+
+    for p in [r"SECTION\s+[A-Z].*", r"True\s*/\s*False", r"📗|📙|📕|📘"]:
+        block = re.sub(p, "", block, flags=re.I)
+    block = block.strip()
+
+    for p in [r"^Q[\dA-Za-z]+[\.\)]\s*", r"^\d+[\.\)]\s*"]:
+        block = re.sub(p, "", block, flags=re.I)
+    block = block.strip()
+
+    question_text = re.split(r"Answer\s*:", block, flags=re.I)[0]
+    question_text = re.split(r"\bA[\)\.]\s*", question_text, maxsplit=1)[0]
+    question_text = question_text.strip()
+
+    options = {}
+    matches = re.findall(
+        r"([A-D])[\)\.]\s*(.*?)(?=[A-D][\)\.]|Answer\s*:|$)", block, re.I
+    )
+    for key, value in matches:
+        clean_val = value.strip(" :-")
+        if clean_val:
+            options[key.upper()] = clean_val
+
+    answer = None
+    match = re.search(
+        r"Answer\s*:\s*(?:Option\s*)?([A-D]|True|False)", block, re.I
+    )
+    if match:
+        answer = match.group(1).upper()
+
+    if not question_text:
+        return None
+
+    if options:
+        q_type = "MCQ"
+    elif re.search(r"\b(true|false)\b", block, re.I):
+        q_type = "TRUE_FALSE"
+    else:
+        q_type = "SHORT"
+
+    return {
+        "question": question_text,
+        "options": options,
+        "answer": answer,
+        "type": q_type,
+        "length": len(question_text.split())
+    }
+
+
+# ================= CORPORA ================= #
+
+def make_long_blocks(count: int = 200, words: int = 600, seed: int = 7) -> str:
+    """
+    OCR-style run-on blocks: long lines, sentence ends like "word." that
+    look like option markers, sparse real options
+    """
+    rng = random.Random(seed)
+    vocab = (
+        "the field a bad road is covered with good sand and mud "
+        "explain how and why it happened"
+    ).split()
+
+    lines = []
+    for q in range(1, count + 1):
+        body = []
+        for n in range(words):
+            word = rng.choice(vocab)
+            body.append(word + ("." if n % 17 == 0 else ""))
+            if n % 150 == 149:
+                body.append(f"{rng.choice('ABCD')})")
+        lines.append(f"Q{q}. " + " ".join(body))
+        lines.append(f"Answer: {rng.choice('ABCD')}")
+    return "\n".join(lines)
+
+
+# ================= RUN ================= #
+
+def _best_of(fn, data, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _blocks(text: str) -> list:
+    """
+    Question blocks as the state machine hands them to _format_question
+    """
+    blocks = []
+    lines = _split_lines(text)
+    for line, starts in zip(lines, question_starts(lines)):
+        if starts:
+            blocks.append([line])
+        elif blocks:
+            blocks[-1].append(line)
+    return blocks
+
+
+def _corpus_results() -> dict:
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        text = f.read()
+    return {
+        "raw": extract_questions(text),
+        "cleaned": extract_questions(clean_text(text)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--update-golden", action="store_true",
+        help="rewrite the expected corpus output from the current parser"
+    )
+    args = parser.parse_args()
+
+    results = _corpus_results()
+
+    if args.update_golden:
+        with open(GOLDEN, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"golden output written to {GOLDEN}")
+        return
+
+    with open(GOLDEN, "r", encoding="utf-8") as f:
+        if json.load(f) != results:
+            raise SystemExit("regression corpus output changed")
+    print(f"regression corpus : {len(results['raw'])} questions, identical")
+
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        corpus = f.read()
+
+    workloads = {
+        "regression corpus": corpus,
+        f"{args.pages}-page dump": clean_text(make_dump(args.pages)),
+        "long OCR blocks": make_long_blocks(),
+    }
+
+    for name, text in workloads.items():
+        if extract_questions(text) != legacy_extract_questions(text):
+            raise SystemExit(f"{name}: output differs from the reference")
+
+        lines = _split_lines(text)
+        if question_starts(lines) != [
+            legacy_is_question_start(line) for line in lines
+        ]:
+            raise SystemExit(f"{name}: question starts differ from the reference")
+
+        blocks = _blocks(text)
+        timings = {
+            "question starts": (
+                _best_of(
+                    lambda ls: [legacy_is_question_start(l) for l in ls],
+                    lines, args.repeat
+                ),
+                _best_of(question_starts, lines, args.repeat),
+            ),
+            "extract_questions": (
+                _best_of(legacy_extract_questions, text, args.repeat),
+                _best_of(extract_questions, text, args.repeat),
+            ),
+            "block formatting": (
+                _best_of(
+                    lambda b: [_legacy_format_question(x) for x in b],
+                    blocks, args.repeat
+                ),
+                _best_of(
+                    lambda b: [_format_question(x) for x in b],
+                    blocks, args.repeat
+                ),
+            ),
+        }
+
+        print(f"{name} (output identical)")
+        for stage, (legacy, current) in timings.items():
+            print(
+                f"  {stage:18}: legacy {legacy * 1000:8.1f} ms, "
+                f"current {current * 1000:8.1f} ms, {legacy / current:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_startup.py
+"""
+Worker startup cost: import time and RSS of the Flask app, and the
+one-off cost of each lazily imported format backend.
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules. Rows:
+- "app": `import app` (what a gunicorn worker pays at boot)
+- "app + <backend>": the app plus the first use of one backend
+- "app + all backends": what a worker costs once it has seen every format
+  (and what preloading in the master moves before the fork)
+
+Run from the repo root:
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from core.extractors import BACKENDS
+
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+from core.extractors import preload_backends
+names = {names!r}
+if names != []:
+    preload_backends(names)
+seconds = time.perf_counter() - start
+unit = 1 if sys.platform == "darwin" else 1024
+print(json.dumps({{
+    "seconds": seconds,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6,
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+def measure(names: list | None, repeat: int) -> dict:
+    """
+    Best-of-`repeat` import time, plus RSS / module count, in fresh
+    interpreters (names: [] = app only, None = every backend)
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(names=names)],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    best = min(runs, key=lambda run: run["seconds"])
+    return {
+        "seconds": round(best["seconds"], 3),
+        "rss_mb": round(max(run["rss_mb"] for run in runs), 1),
+        "modules": best["modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = {"app": measure([], args.repeat)}
+    for name in BACKENDS:
+        rows[f"app + {name}"] = measure([name], args.repeat)
+    rows["app + all backends"] = measure(None, args.repeat)
+
+    base = rows["app"]
+    for label, row in rows.items():
+        extra = ""
+        if label != "app":
+            extra = (
+                f"  (+{row['seconds'] - base['seconds']:.3f} s, "
+                f"+{row['rss_mb'] - base['rss_mb']:.1f} MB)"
+            )
+        print(
+            f"{label:20}: {row['seconds']:6.3f} s, {row['rss_mb']:6.1f} MB RSS, "
+            f"{row['modules']:5} modules{extra}"
+        )
+
+
+if __name__ == "__main__":
+    main()
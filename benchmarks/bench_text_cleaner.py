@@ -0,0 +1,132 @@
+# benchmarks/bench_text_cleaner.py
+"""
+clean_text vs the original multi-pass cleaner on a synthetic 500-page dump.
+
+Run from the repo root:
+    python -m benchmarks.bench_text_cleaner [--pages 500] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+
+from core.text_cleaner import clean_text
+
+
+# ================= REFERENCE (original multi-pass cleaner) ================= #
+
+def legacy_clean_text(text: str) -> str:
+    if not text or not isinstance(text, str):
+        return ""
+
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\t", " ")
+
+    cleaned = []
+    for line in text.split("\n"):
+        line_strip = line.strip()
+        if not line_strip:
+            cleaned.append(line)
+            continue
+        if (
+            line_strip.isupper()
+            and len(line_strip) < 30
+            and not re.search(r"\d", line_strip)
+        ):
+            continue
+        cleaned.append(line)
+    text = "\n".join(cleaned)
+
+    patterns = [
+        r"^\s*page\s*\d+\s*$",
+        r"^\s*\d+\s*/\s*\d+\s*$",
+        r"^\s*-\s*\d+\s*-\s*$"
+    ]
+    cleaned = []
+    for line in text.split("\n"):
+        if any(re.match(p, line.strip().lower()) for p in patterns):
+            continue
+        cleaned.append(line)
+    text = "\n".join(cleaned)
+
+    text = re.sub(r"[�•►■◆]", " ", text)
+    text = re.sub(r"\.{4,}", " ", text)
+    text = re.sub(r"-{4,}", " ", text)
+
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r"([A-D][\)\.])([^\s])", r"\1 \2", text)
+
+    return text.strip()
+
+
+# ================= CORPUS ================= #
+
+def make_dump(pages: int, seed: int = 42) -> str:
+    """
+    Deterministic exam-paper-like text with headers, page numbers,
+    OCR noise and glued option markers
+    """
+    rng = random.Random(seed)
+    words = (
+        "what which explain the of a cell energy photosynthesis plant "
+        "water light process define compare list state why how"
+    ).split()
+
+    out = []
+    q = 1
+    for page in range(1, pages + 1):
+        out.append("SAMPLE QUESTION PAPER")
+        out.append(rng.choice(["SECTION A", "SECTION B", "MCQ"]))
+        out.append("")
+        for _ in range(12):
+            sentence = " ".join(rng.choice(words) for _ in range(14))
+            out.append(f"Q{q}.  {sentence}?")
+            out.append(
+                "A)" + rng.choice(words) + "  B) " + rng.choice(words)
+                + "\tC)" + rng.choice(words) + " D) " + rng.choice(words)
+            )
+            if rng.random() < 0.3:
+                out.append("•  ■ ............ -----")
+            out.append(f"Answer: {rng.choice('ABCD')}")
+            out.append("")
+            q += 1
+        out.append("")
+        out.append("")
+        out.append(rng.choice([f"Page {page}", f"{page}/{pages}", f"- {page} -"]))
+    return "\r\n".join(out)
+
+
+# ================= RUN ================= #
+
+def _best_of(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_dump(args.pages)
+
+    if clean_text(text) != legacy_clean_text(text):
+        raise SystemExit("clean_text output differs from the reference")
+
+    legacy = _best_of(legacy_clean_text, text, args.repeat)
+    current = _best_of(clean_text, text, args.repeat)
+
+    print(f"input: {args.pages} pages, {len(text) / 1e6:.2f} MB")
+    print(f"legacy clean_text : {legacy * 1000:8.1f} ms")
+    print(f"clean_text        : {current * 1000:8.1f} ms")
+    print(f"speedup           : {legacy / current:8.2f}x  (output identical)")
+
+
+if __name__ == "__main__":
+    main()
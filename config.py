@@ -1,6 +1,12 @@
 # config.py
+import os
 
-SUPPORTED_FILE_TYPES = [".pdf", ".docx", ".txt", ".xlsx", ".png", ".jpg"]
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# File formats (core/extractors.py): modules that register extractors.
+# Supported extensions come from the registered extractors.
+EXTRACTOR_PLUGINS = ["core.file_loader", "core.format_plugins"]
+SNIFF_BYTES = 4096              # head of the file read to detect its format
 
 OCR_LANGUAGE = "eng+hin"
 
@@ -11,3 +17,77 @@ ANSWER_REGEX = r"Answer\s*:\s*[A-D]|True|False"
 
 # NLP thresholds
 QUESTION_CONFIDENCE_THRESHOLD = 0.6
+
+# PDF extraction
+PDF_WORKERS = None              # process pool size (None = os.cpu_count())
+PDF_CHUNK_SIZE = 16             # pages handed to a worker per task
+PDF_PARALLEL_MIN_PAGES = 32     # smaller PDFs are extracted serially
+
+# Streaming
+TXT_CHUNK_LINES = 2000          # lines per chunk when streaming .txt files
+
+# Result cache (/extract-questions)
+PIPELINE_VERSION = "1"          # bump to invalidate every cached result
+RESULT_CACHE_MAX_ENTRIES = 128  # in-memory LRU tier, per process
+RESULT_CACHE_DB = os.path.join(BASE_DIR, "cache", "results.sqlite3")  # None = off
+RESULT_CACHE_DB_MAX_ENTRIES = 10000
+
+# Async jobs (/jobs)
+JOB_MAX_WORKERS = 2             # concurrent extractions per process
+JOB_QUEUE_MAX_DEPTH = 32        # queued + running jobs before rejecting
+JOB_TTL_SECONDS = 3600          # finished jobs are kept this long
+JOB_MAX_FINISHED = 64           # ... but at most this many (oldest dropped)
+
+# Scanned PDF pages
+PDF_OCR_FALLBACK = True         # OCR pages without a usable text layer
+PDF_OCR_MIN_CHARS = 20          # text layers shorter than this count as empty
+PDF_OCR_WORKERS = None          # OCR process pool size (None = os.cpu_count())
+
+# OCR cache (keyed on image bytes + preprocessing + tesseract config)
+OCR_CACHE_MAX_ENTRIES = 256     # in-memory LRU tier, per process
+OCR_CACHE_DB = os.path.join(BASE_DIR, "cache", "ocr.sqlite3")  # None = off
+OCR_CACHE_DB_MAX_ENTRIES = 50000
+
+# Batch OCR
+OCR_BATCH_SIZE = 16             # images per tesseract invocation
+OCR_BATCH_WORKERS = 2           # tesseract batches running in parallel
+
+# Batch ingestion (ingest.py)
+INGEST_WORKERS = None           # files processed in parallel (None = os.cpu_count())
+
+# Datasets (dataset_builder.py)
+DATASET_SHARD_BYTES = 64 * 1024 * 1024  # JSONL shard size (None = one shard per run)
+
+# Question store (core/question_store.py, GET /questions)
+QUESTION_STORE_DB = os.path.join(BASE_DIR, "output", "questions.sqlite3")
+QUESTION_STORE_BATCH_SIZE = 1000    # rows per insert transaction
+QUESTION_STORE_MAX_LIMIT = 500      # page size cap for GET /questions
+
+# Near-duplicate detection (nlp/dedup.py)
+DEDUP_THRESHOLD = 0.8           # estimated Jaccard similarity to count as duplicate
+DEDUP_NUM_PERM = 128            # MinHash permutations
+DEDUP_BANDS = 16                # LSH bands (rows per band = NUM_PERM / BANDS)
+DEDUP_SHINGLE_SIZE = 5          # bytes per shingle
+DEDUP_BATCH_SHINGLES = 1 << 20  # shingles hashed per NumPy batch
+DEDUP_SEED = 1                  # fixed, so signatures are stable across runs
+
+# Question scoring (nlp/difficulty_estimator.py)
+SCORING_BATCH_SIZE = 512        # questions scored per batch in the pipeline
+DIFFICULTY_MODEL_PATH = None    # joblib-pickled sklearn model (None = keyword rules)
+
+# Uploads
+UPLOAD_SPILL_BYTES = 16 * 1024 * 1024  # larger uploads go through a temp file
+
+# Batch uploads (/extract-questions/batch)
+BATCH_MAX_WORKERS = 4           # files extracted concurrently, shared by all requests
+BATCH_MAX_FILES = 100           # files per request
+BATCH_TIME_BUDGET_SECONDS = 120 # files not done by then are reported as timed out
+
+# Instrumentation (utils/metrics.py, GET /metrics)
+METRICS_ENABLED = True          # per-stage timing of the pipeline (False = no wrappers)
+METRICS_TIMING_HEADERS = False  # Server-Timing headers on every response (else ?timing=1)
+PROFILE_REQUESTS = False        # allow ?profile=1 to cProfile a single request
+PROFILE_DIR = os.path.join(BASE_DIR, "output", "profiles")
+
+# Worker startup (gunicorn.conf.py)
+PRELOAD_BACKENDS = False        # True or ["pdf", "docx", "excel", "ocr"]: import in the master before fork
@@ -0,0 +1,3 @@
+# conftest.py
+# Makes the top-level modules (config, core, dataset_builder, ...)
+# importable from tests/ when pytest runs from the repository root.
@@ -0,0 +1,274 @@
+# core/extractors.py
+"""
+Extractor registry: one Extractor per file format, picked by sniffing
+the first bytes of the file (the name is only a fallback).
+
+Built-in formats live in core/file_loader.py, optional ones in
+core/format_plugins.py; any module listed in EXTRACTOR_PLUGINS can add
+more with @register_extractor. Heavy libraries are imported through
+load_backend, the first time a format needs them.
+"""
+import importlib
+import io
+import os
+import re
+import time
+import zipfile
+from functools import cached_property, lru_cache
+from typing import Iterator
+
+from config import EXTRACTOR_PLUGINS, SNIFF_BYTES
+from utils.logger import logger
+
+
+# A path on disk, or the file contents in memory
+Source = str | bytes
+
+# Format backends, imported the first time a file needs them (a .txt
+# request never loads PyPDF2, pandas or OpenCV)
+BACKENDS = {
+    "pdf": "PyPDF2",
+    "docx": "docx",
+    "excel": "pandas",
+    "ocr": "ocr.image_reader",   # cv2, numpy, pytesseract
+}
+
+_EXTRACTORS = {}
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+
+
+class Extractor:
+    """
+    Text extraction for one file format (one shared instance per format).
+
+    Subclasses set `name` / `extensions`, implement sniff() and at least
+    one of extract() / iter(), and declare what they can do:
+    - streaming:   iter() yields chunks while reading (else one chunk)
+    - page_ranges: iter() / extract() accept `pages`, a 0-based range of
+                   pages / sheets / slides / frames (see select_pages)
+    - parallel:    iter() spreads work over `workers` processes
+    Lower `priority` values are sniffed first.
+    """
+
+    name = ""
+    extensions = ()
+    streaming = False
+    page_ranges = False
+    parallel = False
+    priority = 10
+
+    def sniff(self, probe: "Probe") -> bool:
+        return False
+
+    def extract(self, source: Source, **options) -> str:
+        return "\n".join(self.iter(source, **options))
+
+    def iter(self, source: Source, workers: int | None = None) -> Iterator[str]:
+        yield self.extract(source)
+
+    def count_pages(self, source: Source) -> int:
+        return 1
+
+    def capabilities(self) -> dict:
+        return {
+            "extensions": list(self.extensions),
+            "streaming": self.streaming,
+            "page_ranges": self.page_ranges,
+            "parallel": self.parallel,
+        }
+
+
+class Probe:
+    """
+    What sniffers look at: the first SNIFF_BYTES bytes, the name's
+    extension and, for ZIP containers, the member names
+    """
+
+    def __init__(self, source: Source, filename: str | None = None):
+        self.source = source
+        self.extension = os.path.splitext(filename or "")[1].lower()
+
+        if isinstance(source, bytes):
+            self.head = source[:SNIFF_BYTES]
+        else:
+            with open(source, "rb") as f:
+                self.head = f.read(SNIFF_BYTES)
+
+    @cached_property
+    def zip_names(self) -> frozenset:
+        if not self.head.startswith(b"PK\x03\x04"):
+            return frozenset()
+        try:
+            with zipfile.ZipFile(open_binary(self.source)) as archive:
+                return frozenset(archive.namelist())
+        except zipfile.BadZipFile:
+            return frozenset()
+
+    @cached_property
+    def text(self) -> str | None:
+        """
+        The head decoded as UTF-8 text, None for binary data
+        """
+        if b"\x00" in self.head:
+            return None
+        try:
+            return self.head.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # a multi-byte character cut off at the end of the head
+            if e.start < len(self.head) - 3:
+                return None
+            return self.head[:e.start].decode("utf-8")
+
+
+# ================= REGISTRY ================= #
+
+def register_extractor(cls):
+    """
+    Class decorator: make an Extractor subclass available (a later
+    registration under the same name replaces the earlier one)
+    """
+    _EXTRACTORS[cls.name] = cls
+    get_extractor.cache_clear()
+    return cls
+
+
+@lru_cache(maxsize=None)
+def get_extractor(name: str) -> Extractor:
+    _load_plugins()
+    if name not in _EXTRACTORS:
+        raise UnsupportedFormatError(f"Unknown format: {name}")
+    return _EXTRACTORS[name]()
+
+
+def detect_extractor(source: Source, filename: str | None = None) -> Extractor:
+    """
+    Extractor for a path or in-memory file: by content first, by the
+    extension of `filename` (or the path) when no sniffer recognizes it
+    """
+    if isinstance(source, str):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"File not found: {source}")
+        filename = filename or source
+
+    probe = Probe(source, filename)
+    extractors = list_extractors()
+
+    for extractor in extractors:
+        if extractor.sniff(probe):
+            return extractor
+
+    for extractor in extractors:
+        if probe.extension in extractor.extensions:
+            return extractor
+
+    raise UnsupportedFormatError(
+        f"Unsupported file type: {probe.extension or 'unknown'}"
+    )
+
+
+def list_extractors() -> list:
+    """
+    One instance per registered format, in sniffing order
+    """
+    _load_plugins()
+    return sorted(
+        (get_extractor(name) for name in _EXTRACTORS),
+        key=lambda extractor: extractor.priority
+    )
+
+
+def supported_extensions() -> list:
+    return sorted({
+        ext for extractor in list_extractors() for ext in extractor.extensions
+    })
+
+
+@lru_cache(maxsize=1)
+def _load_plugins():
+    for module in EXTRACTOR_PLUGINS:
+        importlib.import_module(module)
+
+
+# ================= BACKENDS ================= #
+
+@lru_cache(maxsize=None)
+def load_backend(name: str):
+    """
+    Import a format backend once per process
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(BACKENDS[name])
+    logger.info(
+        f"Loaded {name} backend ({BACKENDS[name]}) "
+        f"in {time.perf_counter() - start:.3f}s"
+    )
+    return module
+
+
+def preload_backends(names: list | None = None) -> dict:
+    """
+    Import format backends up front (all by default), e.g. in the
+    gunicorn master before it forks, so workers share them copy-on-write.
+    Returns seconds per backend.
+    """
+    timings = {}
+    for name in names or BACKENDS:
+        start = time.perf_counter()
+        load_backend(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+# ================= HELPERS FOR EXTRACTORS ================= #
+
+def open_binary(source: Source):
+    """
+    What PdfReader / Document / read_excel / ZipFile take: the path or
+    a buffer
+    """
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def open_text(source: Source):
+    """
+    Text stream with the same decoding and newline handling for both
+    """
+    if isinstance(source, bytes):
+        return io.TextIOWrapper(
+            io.BytesIO(source), encoding="utf-8", errors="ignore"
+        )
+    return open(source, "r", encoding="utf-8", errors="ignore")
+
+
+def read_bytes(source: Source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def select_pages(pages: range | None, count: int) -> range:
+    """
+    The pages of `pages` that exist in a document of `count` pages
+    (all of them for None)
+    """
+    if pages is None:
+        return range(count)
+    return range(count)[pages.start:pages.stop]
+
+
+def normalize_mcq_structure(text: str) -> str:
+    """
+    Make MCQ options & answers appear on separate lines
+    """
+
+    # Newline before options A) B) C) D)
+    text = re.sub(r"([ \t])([A-D][\)\.])", r"\n\2", text)
+
+    # Newline before Answer:
+    text = re.sub(r"(Answer\s*:)", r"\n\1", text, flags=re.I)
+
+    return text
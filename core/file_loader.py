@@ -1,125 +1,612 @@
+import math
 import os
-import re
-from PyPDF2 import PdfReader
-from docx import Document
-import pandas as pd
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator
+
+from config import (
+    PDF_WORKERS, PDF_CHUNK_SIZE, PDF_PARALLEL_MIN_PAGES, TXT_CHUNK_LINES,
+    PDF_OCR_FALLBACK, PDF_OCR_MIN_CHARS, PDF_OCR_WORKERS, OCR_BATCH_SIZE
+)
+from core.extractors import (
+    Extractor, Probe, Source, register_extractor, detect_extractor,
+    load_backend, open_binary, open_text, select_pages,
+    normalize_mcq_structure
+)
+from utils.logger import logger
+from utils import metrics
+from utils.metrics import timed
+
+
+@timed("load_file")
+def load_file(
+    file_path: str | bytes | BinaryIO,
+    filename: str | None = None,
+    pages: range | None = None
+) -> str:
+    """
+    Detect file type and extract raw text.
+    Returns extracted text as string.
+    `file_path` may also be bytes or a binary file-like object (e.g. an
+    upload stream). The format comes from the content; `filename` is only
+    a fallback for content no extractor recognizes.
+    In-memory input never touches the disk.
+    `pages` (0-based range) limits paged formats to those pages / sheets /
+    slides / frames; the rest are never decoded. Other formats ignore it.
+    """
+
+    file_path = _as_source(file_path)
+    extractor = detect_extractor(file_path, filename)
+    metrics.count("bytes", _source_size(file_path), "load_file")
+
+    return extractor.extract(file_path, **_page_options(extractor, pages))
 
-from ocr.image_reader import read_image
 
+@timed("load_file")
+def iter_file(
+    file_path: str | bytes | BinaryIO,
+    workers: int | None = None,
+    filename: str | None = None,
+    pages: range | None = None
+) -> Iterator[str]:
+    """
+    Streaming variant of load_file.
+    Yields raw text chunks (pages / paragraphs / sheets / line blocks)
+    in document order; every chunk ends on a line boundary.
+    `workers` caps the PDF extraction / OCR pools (default: config).
+    Closing the iterator early stops extraction (pending PDF / OCR work
+    is cancelled).
+    """
+
+    file_path = _as_source(file_path)
+    extractor = detect_extractor(file_path, filename)
+    metrics.count("bytes", _source_size(file_path), "load_file")
+    options = _page_options(extractor, pages)
 
-SUPPORTED_EXTENSIONS = [
-    ".pdf", ".docx", ".xlsx", ".txt", ".png", ".jpg", ".jpeg"
-]
+    # pick the cheapest path the format supports
+    if not extractor.streaming:
+        return iter([extractor.extract(file_path, **options)])
 
+    if extractor.parallel:
+        return extractor.iter(file_path, workers, **options)
 
-def load_file(file_path: str) -> str:
+    return extractor.iter(file_path, **options)
+
+
+def count_pages(
+    file_path: str | bytes | BinaryIO,
+    filename: str | None = None
+) -> int:
     """
-    Detect file type and extract raw text.
-    Returns extracted text as string.
+    Page count for throughput reporting:
+    PDF pages, Excel sheets, slides, image frames, 1 for everything else
     """
 
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"File not found: {file_path}")
+    file_path = _as_source(file_path)
+    return detect_extractor(file_path, filename).count_pages(file_path)
+
 
-    ext = os.path.splitext(file_path)[1].lower()
+# ================= EXTRACTORS ================= #
 
-    if ext not in SUPPORTED_EXTENSIONS:
-        raise ValueError(f"Unsupported file type: {ext}")
+def _extract_pdf(
+    path: Source,
+    workers: int | None = PDF_WORKERS,
+    chunk_size: int = PDF_CHUNK_SIZE,
+    pages: range | None = None
+) -> str:
+    """
+    Extract text from PDF and make MCQ structure parser-friendly.
+    Large PDFs are split into page chunks and extracted on a process pool;
+    the result is identical to the serial path.
+    """
+    return "\n".join(_iter_pdf(path, workers, chunk_size, pages=pages))
 
-    if ext == ".pdf":
-        return _extract_pdf(file_path)
 
-    elif ext == ".docx":
-        return _extract_docx(file_path)
+@timed("extract_pdf")
+def _iter_pdf(
+    path: Source,
+    workers: int | None = PDF_WORKERS,
+    chunk_size: int = PDF_CHUNK_SIZE,
+    ocr_workers: int | None = PDF_OCR_WORKERS,
+    pages: range | None = None
+) -> Iterator[str]:
+    """
+    Yield normalized page texts in page order (empty pages skipped).
+    Scanned pages without a usable text layer go through OCR.
+    Only the pages in `pages` are decoded.
+    """
+    reader = load_backend("pdf").PdfReader(open_binary(path))
+    page_nos = select_pages(pages, len(reader.pages))
+    workers = workers or os.cpu_count() or 1
+    metrics.count("pages", len(page_nos), "extract_pdf")
+
+    if workers > 1 and len(page_nos) >= PDF_PARALLEL_MIN_PAGES:
+        texts = _iter_pdf_parallel(path, page_nos, workers, chunk_size)
+    else:
+        texts = (_extract_pdf_page(reader.pages[i]) for i in page_nos)
+
+    if PDF_OCR_FALLBACK:
+        texts = _iter_pdf_ocr_fallback(
+            path, reader, page_nos, texts, ocr_workers
+        )
+
+    for page_text in texts:
+        if page_text:
+            yield page_text
+
+
+def _iter_pdf_parallel(
+    path: Source,
+    page_nos: range,
+    workers: int,
+    chunk_size: int
+) -> Iterator[str]:
+    """
+    Fan page ranges out to worker processes, yield pages back in order.
+    At most two chunks per worker are queued ahead of the consumer, so
+    stopping early leaves the rest of the document unread.
+    """
+    chunk_size = max(1, chunk_size)
+    starts = range(page_nos.start, page_nos.stop, chunk_size)
+    max_ahead = 2 * workers
 
-    elif ext == ".xlsx":
-        return _extract_excel(file_path)
+    pool, task_path = _source_pool(path, min(workers, len(starts)))
+    pending = deque()
+    try:
+        for start in starts:
+            end = min(start + chunk_size, page_nos.stop)
+            pending.append(
+                pool.submit(_extract_pdf_range, task_path, start, end)
+            )
+            if len(pending) >= max_ahead:
+                yield from pending.popleft().result()
 
-    elif ext == ".txt":
-        return _extract_txt(file_path)
+        while pending:
+            yield from pending.popleft().result()
 
-    elif ext in [".png", ".jpg", ".jpeg"]:
-        return _extract_image(file_path)
+    finally:
+        pool.shutdown(cancel_futures=True)
 
-    return ""
 
+def _extract_pdf_range(path: Source | None, start: int, end: int) -> list:
+    """
+    Worker: extract pages [start, end) (each process opens its own reader)
+    """
+    reader = load_backend("pdf").PdfReader(open_binary(_task_source(path)))
+    return [_extract_pdf_page(reader.pages[i]) for i in range(start, end)]
 
-# ================= EXTRACTORS ================= #
 
-def _extract_pdf(path: str) -> str:
+def _extract_pdf_page(page) -> str:
+    page_text = page.extract_text()
+    if not page_text:
+        return ""
+
+    # Force newlines before MCQ options & Answer
+    return normalize_mcq_structure(page_text)
+
+
+def _iter_pdf_ocr_fallback(
+    path: Source,
+    reader,
+    page_nos: range,
+    texts: Iterator[str],
+    workers: int | None = PDF_OCR_WORKERS
+) -> Iterator[str]:
     """
-    Extract text from PDF and make MCQ structure parser-friendly
+    OCR pages whose text layer is (near) empty on a process pool and merge
+    them back with the text-layer pages in page order. Only pages that
+    carry an image are sent to OCR; they go out in batches (one tesseract
+    run each) and the pool starts on the first batch. `texts` are the
+    text layers of `page_nos`.
+    Batches are sized so the pages with images are spread over every
+    worker: up to OCR_BATCH_SIZE, but a 12-page scan on 4 workers goes
+    out as 4 batches of 3, not as one serial batch.
+    The wait for each OCR'd page is the pdf_ocr stage (one observation
+    per page); everything else is extract_pdf time.
     """
-    text_blocks = []
-    reader = PdfReader(path)
+    workers = workers or os.cpu_count() or 1
+    # cheap: nothing is decoded
+    candidates = {i for i in page_nos if _has_images(reader.pages[i])}
+    batch_size = max(
+        1, min(OCR_BATCH_SIZE, math.ceil(len(candidates) / workers))
+    )
+
+    pending = deque()
+    batch = []
+    pool = None
+    task_path = path
+
+    def submit_batch():
+        nonlocal pool, task_path
+        if pool is None:
+            pool, task_path = _source_pool(path, workers)
+        future = pool.submit(
+            _ocr_pdf_pages, task_path, [entry["page_no"] for entry in batch]
+        )
+        for index, entry in enumerate(batch):
+            entry["future"] = future
+            entry["index"] = index
+        batch.clear()
+
+    def ready(entry):
+        return not entry["ocr"] or (
+            entry["future"] is not None and entry["future"].done()
+        )
+
+    try:
+        for page_no, page_text in zip(page_nos, texts):
+            entry = {
+                "page_no": page_no,
+                "text": page_text,
+                "ocr": (
+                    len(page_text.strip()) < PDF_OCR_MIN_CHARS
+                    and page_no in candidates
+                ),
+                "future": None,
+                "index": 0,
+            }
+            pending.append(entry)
+
+            if entry["ocr"]:
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    submit_batch()
+
+            # release pages in order as soon as their OCR is done
+            while pending and ready(pending[0]):
+                yield _merge_ocr_page(pending.popleft())
+
+        if batch:
+            submit_batch()
+
+        while pending:
+            yield _merge_ocr_page(pending.popleft())
+
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _ocr_pdf_pages(path: Source | None, page_nos: list) -> tuple[list, float]:
+    """
+    Worker: OCR the largest image of each page in one batch.
+    Returns ({"text", "params"} per page, seconds); undecodable pages
+    come back empty.
+    """
+    start = time.perf_counter()
+    reader = load_backend("pdf").PdfReader(open_binary(_task_source(path)))
 
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if not page_text:
-            continue
+    images = {}
+    for index, page_no in enumerate(page_nos):
+        try:
+            images[index] = _decode_page_scan(reader.pages[page_no])
+        except Exception as e:
+            logger.warning(
+                f"Cannot decode scan on PDF page {page_no + 1}: {e}"
+            )
+
+    results = [{"text": "", "params": None}] * len(page_nos)
+    ocr_results = load_backend("ocr").read_images(
+        list(images.values()), details=True
+    )
+    for index, result in zip(images, ocr_results):
+        results[index] = result
+
+    return results, time.perf_counter() - start
+
+
+def _decode_page_scan(page):
+    """
+    The scan is the biggest image on the page
+    """
+    images = _page_images(page)
+    if not images:
+        raise ValueError("no image on page")
+
+    image = max(images, key=lambda xobj: xobj["/Width"] * xobj["/Height"])
+    channels = 1 if image.get("/ColorSpace") == "/DeviceGray" else 3
+
+    return load_backend("ocr").decode_image_data(
+        image.get_data(),
+        shape=(image["/Height"], image["/Width"], channels)
+    )
+
+
+def _merge_ocr_page(entry: dict) -> str:
+    if not entry["ocr"]:
+        return entry["text"]
+    return _wait_ocr_page(entry)
+
+
+@timed("pdf_ocr")
+def _wait_ocr_page(entry: dict) -> str:
+    page_text = entry["text"]
+    page_no = entry["page_no"] + 1
+    try:
+        results, seconds = entry["future"].result()
+    except Exception as e:
+        logger.warning(f"OCR failed on PDF page {page_no}: {e}")
+        return page_text
+
+    result = results[entry["index"]]
+    ocr_text = result["text"]
+    logger.info(
+        f"OCR PDF page {page_no}: {len(ocr_text)} chars, "
+        f"{seconds / len(results):.2f}s/page (batch of {len(results)}), "
+        f"preprocessing {result['params']}"
+    )
+
+    ocr_text = normalize_mcq_structure(ocr_text)
+    if len(ocr_text.strip()) > len(page_text.strip()):
+        return ocr_text
+    return page_text
+
+
+def _has_images(page) -> bool:
+    """
+    Cheap check for image XObjects (nothing is decoded)
+    """
+    return bool(_page_images(page))
 
-        # Force newlines before MCQ options & Answer
-        page_text = _normalize_mcq_structure(page_text)
-        text_blocks.append(page_text)
 
-    return "\n".join(text_blocks)
+def _page_images(page) -> list:
+    """
+    Image XObjects on a page. Read directly rather than via page.images,
+    which skips streams whose /Filter is an array.
+    """
+    try:
+        x_objects = page["/Resources"]["/XObject"].get_object()
+        return [
+            x_objects[name].get_object() for name in x_objects
+            if x_objects[name].get("/Subtype") == "/Image"
+        ]
+    except (KeyError, TypeError, AttributeError):
+        return []
 
 
-def _extract_docx(path: str) -> str:
+def _extract_docx(path: Source) -> str:
     """
     Extract text from DOCX while preserving MCQ structure
     """
-    doc = Document(path)
-    lines = []
+    return "\n".join(_iter_docx(path))
+
+
+@timed("extract_docx")
+def _iter_docx(path: Source) -> Iterator[str]:
+    doc = load_backend("docx").Document(open_binary(path))
 
     for para in doc.paragraphs:
         text = para.text.strip()
         if not text:
             continue
 
-        text = _normalize_mcq_structure(text)
-        lines.append(text)
+        yield normalize_mcq_structure(text)
 
-    return "\n".join(lines)
 
-
-def _extract_excel(path: str) -> str:
+def _extract_excel(path: Source, pages: range | None = None) -> str:
     """
     Extract text from Excel (basic support)
     """
-    df = pd.read_excel(path, sheet_name=None)
-    text = []
+    return "\n".join(_iter_excel(path, pages))
+
 
-    for sheet in df.values():
-        text.append(sheet.astype(str).to_string())
+@timed("extract_excel")
+def _iter_excel(path: Source, pages: range | None = None) -> Iterator[str]:
+    """
+    One chunk per sheet; only the sheets in `pages` are parsed
+    """
+    with load_backend("excel").ExcelFile(open_binary(path)) as excel:
+        names = excel.sheet_names
+        sheets = select_pages(pages, len(names))
+        metrics.count("pages", len(sheets), "extract_excel")
 
-    return "\n".join(text)
+        for index in sheets:
+            yield excel.parse(names[index]).astype(str).to_string()
 
 
-def _extract_txt(path: str) -> str:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+@timed("extract_txt")
+def _extract_txt(path: Source) -> str:
+    with open_text(path) as f:
         return f.read()
 
 
-def _extract_image(path: str) -> str:
+@timed("extract_txt")
+def _iter_txt(path: Source) -> Iterator[str]:
+    """
+    Yield TXT_CHUNK_LINES lines at a time
+    """
+    with open_text(path) as f:
+        block = []
+        for line in f:
+            block.append(line)
+            if len(block) >= TXT_CHUNK_LINES:
+                yield "".join(block)
+                block = []
+
+        if block:
+            yield "".join(block)
+
+
+@timed("extract_image", counts=lambda text: {"pages": 1})
+def _extract_image(path: Source) -> str:
     """
     OCR image text and normalize MCQ structure
     """
-    text = read_image(path)
-    return _normalize_mcq_structure(text)
+    if isinstance(path, bytes):
+        text = load_backend("ocr").read_image_data(path)
+    else:
+        text = load_backend("ocr").read_image(path)
+    return normalize_mcq_structure(text)
+
+
+# ================= REGISTRY ================= #
+
+@register_extractor
+class PdfExtractor(Extractor):
+    name = "pdf"
+    extensions = (".pdf",)
+    streaming = True
+    page_ranges = True
+    parallel = True
+
+    def sniff(self, probe: Probe) -> bool:
+        # only a BOM / whitespace before the header: a text file that
+        # mentions "%PDF-" stays text
+        head = probe.head.removeprefix(b"\xef\xbb\xbf").lstrip()
+        return head.startswith(b"%PDF-")
+
+    def extract(self, source: Source, pages: range | None = None) -> str:
+        return _extract_pdf(source, pages=pages)
+
+    def iter(
+        self,
+        source: Source,
+        workers: int | None = None,
+        pages: range | None = None
+    ):
+        if workers:
+            return _iter_pdf(
+                source, workers, ocr_workers=workers, pages=pages
+            )
+        return _iter_pdf(source, pages=pages)
+
+    def count_pages(self, source: Source) -> int:
+        return len(load_backend("pdf").PdfReader(open_binary(source)).pages)
+
+
+@register_extractor
+class DocxExtractor(Extractor):
+    name = "docx"
+    extensions = (".docx",)
+    streaming = True
+
+    def sniff(self, probe: Probe) -> bool:
+        return "word/document.xml" in probe.zip_names
+
+    def extract(self, source: Source) -> str:
+        return _extract_docx(source)
+
+    def iter(self, source: Source, workers: int | None = None):
+        return _iter_docx(source)
+
+
+@register_extractor
+class ExcelExtractor(Extractor):
+    name = "xlsx"
+    extensions = (".xlsx",)
+    streaming = True
+    page_ranges = True      # sheets
+
+    def sniff(self, probe: Probe) -> bool:
+        return "xl/workbook.xml" in probe.zip_names
+
+    def extract(self, source: Source, pages: range | None = None) -> str:
+        return _extract_excel(source, pages)
+
+    def iter(
+        self,
+        source: Source,
+        workers: int | None = None,
+        pages: range | None = None
+    ):
+        return _iter_excel(source, pages)
+
+    def count_pages(self, source: Source) -> int:
+        with load_backend("excel").ExcelFile(open_binary(source)) as excel:
+            return len(excel.sheet_names)
+
+
+@register_extractor
+class ImageExtractor(Extractor):
+    name = "image"
+    extensions = (".png", ".jpg", ".jpeg")
+
+    def sniff(self, probe: Probe) -> bool:
+        return probe.head.startswith((b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff"))
+
+    def extract(self, source: Source) -> str:
+        return _extract_image(source)
+
+
+@register_extractor
+class TextExtractor(Extractor):
+    name = "txt"
+    extensions = (".txt",)
+    streaming = True
+    priority = 100      # anything that decodes as text: sniffed last
+
+    def sniff(self, probe: Probe) -> bool:
+        return probe.text is not None
+
+    def extract(self, source: Source) -> str:
+        return _extract_txt(source)
+
+    def iter(self, source: Source, workers: int | None = None):
+        return _iter_txt(source)
 
 
 # ================= HELPERS ================= #
 
-def _normalize_mcq_structure(text: str) -> str:
+# in-memory file a pool worker was started with (see _source_pool)
+_worker_source = None
+
+
+def _source_pool(path: Source, workers: int) -> tuple:
     """
-    Make MCQ options & answers appear on separate lines
+    Process pool for tasks on `path`. In-memory files go to each worker
+    once, at start-up, instead of being pickled with every task: tasks
+    then get None as their path (see _task_source).
+    Returns (pool, path to pass to tasks).
     """
+    if isinstance(path, bytes):
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_set_worker_source,
+            initargs=(path,)
+        )
+        return pool, None
+
+    return ProcessPoolExecutor(max_workers=workers), path
+
+
+def _set_worker_source(data: bytes):
+    global _worker_source
+    _worker_source = data
+
 
-    # Newline before options A) B) C) D)
-    text = re.sub(r"([ \t])([A-D][\)\.])", r"\n\2", text)
+def _task_source(path: Source | None) -> Source:
+    return _worker_source if path is None else path
+
+
+def _as_source(file_path) -> Source:
+    """
+    Path (str / PathLike) or in-memory bytes; file-like objects are read
+    """
+    if isinstance(file_path, (str, os.PathLike)):
+        return os.fspath(file_path)
+
+    if isinstance(file_path, (bytes, bytearray, memoryview)):
+        return bytes(file_path)
+
+    if hasattr(file_path, "read"):
+        if hasattr(file_path, "seek"):
+            file_path.seek(0)
+        data = file_path.read()
+        if isinstance(data, bytes):
+            return data
+
+    raise TypeError(f"Unsupported file source: {type(file_path).__name__}")
+
+
+def _page_options(extractor: Extractor, pages: range | None) -> dict:
+    """
+    Pass `pages` only to extractors that support page ranges
+    """
+    if pages is None or not extractor.page_ranges:
+        return {}
+    return {"pages": pages}
 
-    # Newline before Answer:
-    text = re.sub(r"(Answer\s*:)", r"\n\1", text, flags=re.I)
 
-    return text
+def _source_size(path: Source) -> int:
+    return len(path) if isinstance(path, bytes) else os.path.getsize(path)
@@ -0,0 +1,337 @@
+# core/format_plugins.py
+"""
+Optional formats on top of the built-in ones in core/file_loader.py:
+PowerPoint (.pptx), OpenDocument text (.odt), HTML and multi-page TIFF
+scans. Office formats are read straight from their ZIP / XML parts, so
+no extra dependencies are needed.
+"""
+import posixpath
+import re
+import sys
+import zipfile
+from html.parser import HTMLParser
+from typing import Iterator
+from xml.etree import ElementTree
+
+from config import OCR_BATCH_SIZE
+from core.extractors import (
+    Extractor, Probe, Source, register_extractor, load_backend,
+    open_binary, open_text, read_bytes, select_pages,
+    normalize_mcq_structure
+)
+from utils import metrics
+from utils.metrics import timed
+
+
+# ================= PPTX ================= #
+
+_DRAWING = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_PRESENTATION = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_SLIDE_NAME = re.compile(r"ppt/slides/slide(\d+)\.xml$")
+
+
+@register_extractor
+class PptxExtractor(Extractor):
+    """
+    One chunk per slide, in presentation order
+    """
+
+    name = "pptx"
+    extensions = (".pptx",)
+    streaming = True
+    page_ranges = True      # slides
+
+    def sniff(self, probe: Probe) -> bool:
+        return "ppt/presentation.xml" in probe.zip_names
+
+    def iter(
+        self,
+        source: Source,
+        workers: int | None = None,
+        pages: range | None = None
+    ):
+        return _iter_pptx(source, pages)
+
+    def count_pages(self, source: Source) -> int:
+        with zipfile.ZipFile(open_binary(source)) as archive:
+            return len(_slide_order(archive))
+
+
+@timed("extract_pptx")
+def _iter_pptx(source: Source, pages: range | None = None) -> Iterator[str]:
+    with zipfile.ZipFile(open_binary(source)) as archive:
+        slides = _slide_order(archive)
+        slides = [slides[i] for i in select_pages(pages, len(slides))]
+        metrics.count("pages", len(slides), "extract_pptx")
+
+        for name in slides:
+            root = ElementTree.fromstring(archive.read(name))
+            paragraphs = []
+            for paragraph in root.iter(f"{_DRAWING}p"):
+                text = "".join(
+                    run.text or "" for run in paragraph.iter(f"{_DRAWING}t")
+                ).strip()
+                if text:
+                    paragraphs.append(normalize_mcq_structure(text))
+
+            if paragraphs:
+                yield "\n".join(paragraphs)
+
+
+def _slide_order(archive: zipfile.ZipFile) -> list:
+    """
+    Slide part names in the order of the presentation's slide list (the
+    slideN numbering goes stale when slides are moved)
+    """
+    names = set(archive.namelist())
+    try:
+        presentation = ElementTree.fromstring(
+            archive.read("ppt/presentation.xml")
+        )
+        rels = ElementTree.fromstring(
+            archive.read("ppt/_rels/presentation.xml.rels")
+        )
+        targets = {
+            rel.get("Id"): posixpath.normpath(
+                posixpath.join("ppt", rel.get("Target", ""))
+            )
+            for rel in rels.iter(f"{_PACKAGE_REL}Relationship")
+        }
+        ordered = [
+            targets.get(slide.get(_REL_ID))
+            for slide in presentation.iter(f"{_PRESENTATION}sldId")
+        ]
+        ordered = [name for name in ordered if name in names]
+        if ordered:
+            return ordered
+    except (KeyError, ElementTree.ParseError):
+        pass
+
+    numbered = [
+        (int(match.group(1)), name)
+        for name in names if (match := _SLIDE_NAME.match(name))
+    ]
+    return [name for _, name in sorted(numbered)]
+
+
+# ================= ODT ================= #
+
+_ODF_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_ODF_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_ODT_MIMETYPE = b"mimetypeapplication/vnd.oasis.opendocument.text"
+
+
+@register_extractor
+class OdtExtractor(Extractor):
+    """
+    One chunk per paragraph / heading (lists, tables and sections are
+    walked in document order)
+    """
+
+    name = "odt"
+    extensions = (".odt",)
+    streaming = True
+
+    def sniff(self, probe: Probe) -> bool:
+        # ODF stores an uncompressed "mimetype" member first
+        return probe.head.startswith(b"PK\x03\x04") and (
+            _ODT_MIMETYPE in probe.head[:128]
+        )
+
+    def iter(self, source: Source, workers: int | None = None):
+        return _iter_odt(source)
+
+
+@timed("extract_odt")
+def _iter_odt(source: Source) -> Iterator[str]:
+    with zipfile.ZipFile(open_binary(source)) as archive:
+        root = ElementTree.fromstring(archive.read("content.xml"))
+
+    body = root.find(f"{_ODF_OFFICE}body")
+    if body is None:
+        return
+
+    for text in _odf_paragraphs(body):
+        text = text.strip()
+        if text:
+            yield normalize_mcq_structure(text)
+
+
+def _odf_paragraphs(element) -> Iterator[str]:
+    for child in element:
+        if child.tag in (f"{_ODF_TEXT}p", f"{_ODF_TEXT}h"):
+            yield _odf_text(child)
+        else:
+            yield from _odf_paragraphs(child)
+
+
+def _odf_text(element) -> str:
+    """
+    Paragraph text with ODF whitespace elements expanded
+    """
+    parts = [element.text or ""]
+
+    for child in element:
+        if child.tag == f"{_ODF_TEXT}s":
+            parts.append(" " * int(child.get(f"{_ODF_TEXT}c", "1")))
+        elif child.tag == f"{_ODF_TEXT}tab":
+            parts.append(" ")
+        elif child.tag == f"{_ODF_TEXT}line-break":
+            parts.append("\n")
+        else:
+            parts.append(_odf_text(child))
+        parts.append(child.tail or "")
+
+    return "".join(parts)
+
+
+# ================= HTML ================= #
+
+# optional leading comments, then a doctype or <html>
+_HTML_START = re.compile(
+    r"\s*(?:<!--.*?-->\s*)*<(?:!doctype\s+html|html)\b", re.I | re.S
+)
+
+_HTML_READ_CHARS = 64 * 1024
+
+
+@register_extractor
+class HtmlExtractor(Extractor):
+    """
+    Visible text, one line per block element (script / style skipped),
+    streamed while the document is parsed
+    """
+
+    name = "html"
+    extensions = (".html", ".htm")
+    streaming = True
+    priority = 50       # before plain text
+
+    def sniff(self, probe: Probe) -> bool:
+        text = probe.text
+        return text is not None and bool(_HTML_START.match(text.lstrip("\ufeff")))
+
+    def iter(self, source: Source, workers: int | None = None):
+        return _iter_html(source)
+
+
+@timed("extract_html")
+def _iter_html(source: Source) -> Iterator[str]:
+    parser = _HtmlText()
+
+    with open_text(source) as f:
+        while True:
+            data = f.read(_HTML_READ_CHARS)
+            if not data:
+                break
+            parser.feed(data)
+            chunk = parser.pop_lines()
+            if chunk:
+                yield chunk
+
+    parser.close()
+    chunk = parser.pop_lines(final=True)
+    if chunk:
+        yield chunk
+
+
+class _HtmlText(HTMLParser):
+    BLOCKS = {
+        "address", "article", "aside", "blockquote", "br", "dd", "div",
+        "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form",
+        "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+        "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+    }
+    SKIP = {"script", "style", "template", "noscript", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._buffer = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCKS:
+            self._buffer.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCKS:
+            self._buffer.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buffer.append(data)
+
+    def pop_lines(self, final: bool = False) -> str:
+        """
+        Finished lines collected so far (whitespace collapsed, empty
+        lines dropped); an unfinished last line stays buffered
+        """
+        text = "".join(self._buffer)
+        if final:
+            done, rest = text, ""
+        else:
+            done, _, rest = text.rpartition("\n")
+        self._buffer = [rest] if rest else []
+
+        lines = (" ".join(line.split()) for line in done.split("\n"))
+        return "\n".join(
+            normalize_mcq_structure(line) for line in lines if line
+        )
+
+
+# ================= TIFF ================= #
+
+@register_extractor
+class TiffExtractor(Extractor):
+    """
+    Multi-page scans: frames are decoded and OCR'd OCR_BATCH_SIZE at a
+    time (one tesseract run per batch)
+    """
+
+    name = "tiff"
+    extensions = (".tif", ".tiff")
+    streaming = True
+    page_ranges = True      # frames
+
+    def sniff(self, probe: Probe) -> bool:
+        return probe.head.startswith((b"II*\x00", b"MM\x00*"))
+
+    def iter(
+        self,
+        source: Source,
+        workers: int | None = None,
+        pages: range | None = None
+    ):
+        return _iter_tiff(source, pages)
+
+    def count_pages(self, source: Source) -> int:
+        return len(load_backend("ocr").decode_image_frames(read_bytes(source)))
+
+
+@timed("extract_tiff")
+def _iter_tiff(source: Source, pages: range | None = None) -> Iterator[str]:
+    ocr = load_backend("ocr")
+    data = read_bytes(source)
+    # the frame count is only known once decoded: run until frames run out
+    pages = pages if pages is not None else range(sys.maxsize)
+
+    # decode batch by batch: frames after an early stop are never decoded
+    for start in range(pages.start, pages.stop, OCR_BATCH_SIZE):
+        end = min(start + OCR_BATCH_SIZE, pages.stop)
+        frames = ocr.decode_image_frames(data, (start, end))
+        metrics.count("pages", len(frames), "extract_tiff")
+
+        for text in ocr.read_images(frames):
+            text = normalize_mcq_structure(text).strip()
+            if text:
+                yield text
+
+        if len(frames) < end - start:
+            break
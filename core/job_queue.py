@@ -0,0 +1,155 @@
+# core/job_queue.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    JOB_MAX_WORKERS, JOB_QUEUE_MAX_DEPTH, JOB_TTL_SECONDS, JOB_MAX_FINISHED
+)
+from core.pipeline import extract_file
+from utils.logger import logger
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Bounded in-process job runner for long extractions (no broker).
+
+    Jobs run on a thread pool of `max_workers`; at most `max_depth` jobs
+    may be queued or running at once, and finished jobs are forgotten
+    `ttl_seconds` after completion; only the latest `max_finished` are
+    kept (results stay in memory until then). State lives in this
+    process, so each gunicorn worker owns its own jobs.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        max_depth: int = JOB_QUEUE_MAX_DEPTH,
+        ttl_seconds: int = JOB_TTL_SECONDS,
+        max_finished: int = JOB_MAX_FINISHED
+    ):
+        self.max_depth = max_depth
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="extract-job"
+        )
+
+    # ---------------- PUBLIC ---------------- #
+
+    def submit(self, file_path: str | bytes, source: str, **options) -> str:
+        """
+        Queue an extraction of a path or in-memory file contents; the job
+        takes ownership of a path and deletes it when done.
+        `options` (pages, max_questions) are passed on to extract_file.
+        Raises QueueFullError when saturated.
+        """
+        self._purge_expired()
+
+        with self._lock:
+            active = sum(
+                1 for job in self._jobs.values()
+                if job["status"] in ("queued", "running")
+            )
+            if active >= self.max_depth:
+                raise QueueFullError(
+                    f"Job queue is full ({self.max_depth} active jobs)"
+                )
+
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "source": source,
+                "progress": {"questions": 0},
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "cache": None,
+                "result": None,
+                "error": None,
+            }
+
+        self._executor.submit(self._run, job_id, file_path, source, options)
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        Snapshot of a job (None if unknown or expired)
+        """
+        self._purge_expired()
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "progress": dict(job["progress"])}
+
+    # ---------------- WORKER ---------------- #
+
+    def _run(
+        self,
+        job_id: str,
+        file_path: str | bytes,
+        source: str,
+        options: dict
+    ):
+        self._update(job_id, status="running", started_at=time.time())
+
+        def on_question(count: int):
+            with self._lock:
+                self._jobs[job_id]["progress"]["questions"] = count
+
+        try:
+            questions, cache_hit = extract_file(
+                file_path, source=source, on_question=on_question, **options
+            )
+            self._update(
+                job_id,
+                status="done",
+                result=questions,
+                cache="hit" if cache_hit else "miss",
+                progress={"questions": len(questions)},
+                finished_at=time.time()
+            )
+
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            self._update(
+                job_id, status="failed", error=str(e), finished_at=time.time()
+            )
+
+        finally:
+            if isinstance(file_path, str) and os.path.exists(file_path):
+                os.remove(file_path)
+            self._purge_expired()
+
+    # ---------------- HELPERS ---------------- #
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+
+        with self._lock:
+            finished = sorted(
+                (job["finished_at"], job_id)
+                for job_id, job in self._jobs.items()
+                if job["finished_at"] is not None
+            )
+            # past the TTL, or beyond the newest `max_finished`
+            excess = max(0, len(finished) - self.max_finished)
+            for index, (finished_at, job_id) in enumerate(finished):
+                if index < excess or finished_at < cutoff:
+                    del self._jobs[job_id]
@@ -2,7 +2,10 @@
 import uuid
 from datetime import datetime
 
+from utils.metrics import timed
 
+
+@timed("format_output")
 def format_output(
     question: str,
     q_type: str = "unknown",
@@ -31,6 +34,20 @@ def format_output(
     }
 
 
+def reissue_output(record: dict, source: str) -> dict:
+    """
+    Copy of a cached record as a new question: fresh id and created_at,
+    under `source`
+    """
+    return {
+        **record,
+        "id": _generate_id(),
+        "options": dict(record["options"]),
+        "source": source,
+        "meta": {**record["meta"], "created_at": _timestamp()},
+    }
+
+
 # ------------------ Helpers ------------------ #
 
 def _generate_id() -> str:
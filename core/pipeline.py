@@ -0,0 +1,236 @@
+# core/pipeline.py
+import glob
+import hashlib
+import itertools
+import os
+from typing import Callable, Iterator
+
+import config
+from config import (
+    BASE_DIR,
+    PIPELINE_VERSION,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_DB,
+    RESULT_CACHE_DB_MAX_ENTRIES,
+    SCORING_BATCH_SIZE,
+)
+from core.file_loader import iter_file
+from core.text_cleaner import clean_chunks
+from core.question_parser import iter_questions
+from core.output_formatter import format_output, reissue_output
+from nlp.difficulty_estimator import estimate_difficulties
+from utils.cache import ResultCache
+from utils.file_utils import get_file_hash
+
+
+# Source files whose code determines pipeline output (server, queue and
+# store modules are left out: editing them must not invalidate results)
+PIPELINE_SOURCES = [
+    "core/pipeline.py",
+    "core/extractors.py",
+    "core/file_loader.py",
+    "core/format_plugins.py",
+    "core/text_cleaner.py",
+    "core/question_parser.py",
+    "core/output_formatter.py",
+    "nlp/question_detector.py",
+    "nlp/difficulty_estimator.py",
+    "nlp/features.py",
+    "ocr/*.py",
+]
+
+# config.py settings that change pipeline output (the rest only tune
+# speed, caching or the server)
+PIPELINE_SETTINGS = [
+    "EXTRACTOR_PLUGINS",
+    "SNIFF_BYTES",
+    "TXT_CHUNK_LINES",
+    "PDF_OCR_FALLBACK",
+    "PDF_OCR_MIN_CHARS",
+    "DIFFICULTY_MODEL_PATH",
+]
+
+
+def iter_formatted_questions(
+    file_path: str | bytes,
+    source: str,
+    workers: int | None = None,
+    pages: range | None = None,
+    max_questions: int | None = None
+) -> Iterator[dict]:
+    """
+    load → clean → parse → score → format, streamed in batches of
+    SCORING_BATCH_SIZE questions.
+    `file_path` may be the file contents; `source` then names the type.
+    `pages` (0-based range) limits paged formats to those pages; with
+    `max_questions` extraction stops as soon as that many are parsed.
+    """
+    chunks = iter_file(file_path, workers, filename=source, pages=pages)
+    parsed = iter_questions(clean_chunks(chunks))
+    questions = itertools.islice(parsed, max_questions)
+
+    try:
+        batch = []
+        for q in questions:
+            batch.append(q)
+            if len(batch) >= SCORING_BATCH_SIZE:
+                yield from _format_batch(batch, source)
+                batch = []
+
+        if batch:
+            yield from _format_batch(batch, source)
+
+    finally:
+        # stop reading (and cancel pending PDF / OCR work) right away
+        parsed.close()
+
+
+def stream_file(
+    file_path: str | bytes,
+    source: str,
+    workers: int | None = None,
+    pages: range | None = None,
+    max_questions: int | None = None
+) -> tuple[Iterator[dict], bool]:
+    """
+    Like extract_file, but hand questions out as they are formatted.
+    Returns (question iterator, cache hit?); on a miss the result is
+    cached only once the iterator has been consumed to the end.
+    """
+    key = _cache_key(file_path)
+
+    # a cached full result also answers a question limit
+    questions = result_cache.get(key) if pages is None else None
+
+    # page ranges / limits are cached on their own
+    if questions is None and (pages is not None or max_questions is not None):
+        key = f"{key}:{_options_key(pages, max_questions)}"
+        questions = result_cache.get(key)
+
+    if questions is not None:
+        # every upload gets its own questions (ids, timestamps), even for
+        # the same bytes under another name
+        questions = [
+            reissue_output(q, source) for q in questions[:max_questions]
+        ]
+        return iter(questions), True
+
+    stream = _stream_and_cache(
+        file_path, source, key, workers, pages, max_questions
+    )
+    return stream, False
+
+
+def extract_file(
+    file_path: str | bytes,
+    source: str,
+    on_question: Callable[[int], None] | None = None,
+    workers: int | None = None,
+    pages: range | None = None,
+    max_questions: int | None = None
+) -> tuple[list, bool]:
+    """
+    Run the pipeline through the content-hash result cache.
+    `file_path` is a path or the file contents (bytes).
+    Returns (formatted questions, cache hit?).
+    `on_question` is called with the running count as questions come out;
+    `workers` caps the per-file PDF / OCR pools; `pages` and
+    `max_questions` work as in iter_formatted_questions.
+    """
+    stream, cache_hit = stream_file(
+        file_path, source, workers, pages, max_questions
+    )
+    if cache_hit:
+        return list(stream), True
+
+    questions = []
+    for q in stream:
+        questions.append(q)
+        if on_question:
+            on_question(len(questions))
+
+    return questions, False
+
+
+# ================= HELPERS ================= #
+
+def _cache_key(file_path: str | bytes) -> str:
+    if isinstance(file_path, bytes):
+        content_hash = hashlib.sha256(file_path).hexdigest()
+    else:
+        content_hash = get_file_hash(file_path)
+    return f"{content_hash}:{PIPELINE_FINGERPRINT}"
+
+
+def _options_key(pages: range | None, max_questions: int | None) -> str:
+    pages = f"{pages.start}-{pages.stop}" if pages is not None else "all"
+    return f"pages={pages}:max={max_questions}"
+
+
+def _stream_and_cache(
+    file_path: str | bytes,
+    source: str,
+    key: str,
+    workers: int | None,
+    pages: range | None = None,
+    max_questions: int | None = None
+) -> Iterator[dict]:
+    questions = []
+    for q in iter_formatted_questions(
+        file_path, source, workers, pages, max_questions
+    ):
+        questions.append(q)
+        yield q
+
+    # not reached when the consumer stops early (client disconnect)
+    result_cache.set(key, questions)
+
+
+def _format_batch(questions: list, source: str) -> Iterator[dict]:
+    """
+    Score difficulty for a batch at once (the type comes from the parser,
+    which sets one on every question)
+    """
+    texts = [q.get("question", "") for q in questions]
+    difficulties = estimate_difficulties(texts)
+
+    for q, difficulty in zip(questions, difficulties):
+        yield format_output(
+            question=q.get("question"),
+            q_type=q.get("type", "unknown"),
+            difficulty=difficulty,
+            source=source,
+            options=q.get("options", {}),
+            answer=q.get("answer")
+        )
+
+
+def _pipeline_fingerprint() -> str:
+    """
+    PIPELINE_VERSION + hash of the pipeline source code and the settings
+    it reads, so a deploy that changes extraction logic never serves
+    results from the old code
+    """
+    digest = hashlib.sha256(PIPELINE_VERSION.encode())
+
+    for name in PIPELINE_SETTINGS:
+        digest.update(f"{name}={getattr(config, name)!r}\n".encode())
+
+    paths = set()
+    for pattern in PIPELINE_SOURCES:
+        paths.update(glob.glob(os.path.join(BASE_DIR, pattern)))
+
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()[:16]
+
+
+PIPELINE_FINGERPRINT = _pipeline_fingerprint()
+
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    db_path=RESULT_CACHE_DB,
+    max_disk_entries=RESULT_CACHE_DB_MAX_ENTRIES,
+)
@@ -1,5 +1,27 @@
 import re
-from nlp.question_detector import is_question_start
+from typing import Iterable, Iterator
+from nlp.question_detector import question_starts
+from utils.metrics import timed
+
+
+# ================= PATTERNS ================= #
+
+# Section headers, labels, emojis
+_SECTION_NOISE = re.compile(r"SECTION\s+[A-Z].*", re.I)
+_TRUE_FALSE_LABEL = re.compile(r"True\s*/\s*False", re.I)
+_EMOJI_NOISE = re.compile(r"[📗📙📕📘]")
+
+# Leading numbering: Q1. Q2) Ql. / 1. 2)
+_Q_NUMBERING = re.compile(r"^Q[\dA-Za-z]+[\.\)]\s*", re.I)
+_NUMBERING = re.compile(r"^\d+[\.\)]\s*")
+
+# One scan of a block finds every option marker and "Answer:" label
+# (the leading lookahead lets the engine skip to candidate letters)
+_BLOCK_TOKEN = re.compile(r"(?=[A-D])(?:([A-D])[\)\.]|Answer\s*:)", re.I)
+_ANSWER_VALUE = re.compile(r"\s*(?:Option\s*)?([A-D]|True|False)", re.I)
+
+_TRUE_FALSE = re.compile(r"\b(true|false)\b", re.I)
+_WORD_CHAR = re.compile(r"\w")
 
 
 # ================= MAIN ================= #
@@ -8,29 +30,40 @@ def extract_questions(text: str):
     if not text or not isinstance(text, str):
         return []
 
-    lines = _split_lines(text)
+    return list(iter_questions([text]))
+
+
+@timed("extract_questions", counts=lambda q: {"questions": 1})
+def iter_questions(chunks: Iterable[str]) -> Iterator[dict]:
+    """
+    Streaming variant of extract_questions.
+    Consumes text chunks (pages / paragraphs) and yields each question as
+    soon as its block closes; a block may span chunk boundaries.
+    """
 
-    questions = []
     current_block = []
 
-    for line in lines:
-        if is_question_start(line):
-            if current_block:
-                q = _format_question(current_block)
-                if q:
-                    questions.append(q)
-                current_block = []
-            current_block.append(line)
-        else:
-            if current_block:
+    for chunk in chunks:
+        if not chunk or not isinstance(chunk, str):
+            continue
+
+        lines = _split_lines(chunk)
+        for line, starts in zip(lines, question_starts(lines)):
+            if starts:
+                if current_block:
+                    q = _format_question(current_block)
+                    if q:
+                        yield q
+                    current_block = []
                 current_block.append(line)
+            else:
+                if current_block:
+                    current_block.append(line)
 
     if current_block:
         q = _format_question(current_block)
         if q:
-            questions.append(q)
-
-    return questions
+            yield q
 
 
 # ================= HELPERS ================= #
@@ -45,9 +78,7 @@ def _format_question(lines: list):
     block = _remove_section_noise(block)
     block = _clean_numbering(block)
 
-    question_text = _extract_question_text(block)
-    options = _extract_options(block)
-    answer = _extract_answer(block)
+    question_text, options, answer = _scan_block(block)
 
     if not question_text:
         return None
@@ -55,7 +86,7 @@ def _format_question(lines: list):
     # Detect type
     if options:
         q_type = "MCQ"
-    elif re.search(r"\b(true|false)\b", block, re.I):
+    elif _TRUE_FALSE.search(block):
         q_type = "TRUE_FALSE"
     else:
         q_type = "SHORT"
@@ -73,64 +104,80 @@ def _format_question(lines: list):
 
 def _remove_section_noise(text: str):
     # Remove section headers, emojis, labels
-    noise_patterns = [
-        r"SECTION\s+[A-Z].*",
-        r"True\s*/\s*False",
-        r"📗|📙|📕|📘",
-    ]
-    for p in noise_patterns:
-        text = re.sub(p, "", text, flags=re.I)
+    text = _SECTION_NOISE.sub("", text)
+    text = _TRUE_FALSE_LABEL.sub("", text)
+    text = _EMOJI_NOISE.sub("", text)
 
     return text.strip()
 
 
 def _clean_numbering(text: str):
-    patterns = [
-        r"^Q[\dA-Za-z]+[\.\)]\s*",
-        r"^\d+[\.\)]\s*",
-    ]
-    for p in patterns:
-        text = re.sub(p, "", text, flags=re.I)
+    text = _Q_NUMBERING.sub("", text)
+    text = _NUMBERING.sub("", text)
     return text.strip()
 
 
 # ================= EXTRACTION ================= #
 
-def _extract_question_text(block: str):
-    # Remove Answer part
-    block = re.split(r"Answer\s*:", block, flags=re.I)[0]
-
-    # Stop before first option
-    split = re.split(r"\bA[\)\.]\s*", block, maxsplit=1)
-    return split[0].strip()
-
-
-def _extract_options(block: str):
+def _scan_block(block: str):
+    """
+    Single left-to-right scan over option markers (A) b. ...) and
+    "Answer:" labels. Returns (question text, options, answer):
+
+    - question text: everything before the first word-initial "A)" / "A."
+      that precedes the first "Answer:" (or before that label)
+    - options: each marker's text runs up to the next marker / label;
+      a repeated letter keeps its last non-empty text
+    - answer: letter / True / False after the first "Answer:" that has one
+    """
     options = {}
-
-    # Handle both inline & multiline OCR
-    matches = re.findall(
-        r"([A-D])[\)\.]\s*(.*?)(?=[A-D][\)\.]|Answer\s*:|$)",
-        block,
-        re.I
-    )
-
-    for key, value in matches:
-        clean_val = value.strip(" :-")
-        if clean_val:
-            options[key.upper()] = clean_val
-
-    return options
-
-
-def _extract_answer(block: str):
-    # MCQ / TF answers
-    match = re.search(
-        r"Answer\s*:\s*(?:Option\s*)?([A-D]|True|False)",
-        block,
-        re.I
-    )
-    if match:
-        return match.group(1).upper()
-
-    return None
+    answer = None
+    question_end = None
+    answer_start = None
+
+    option_key = None
+    option_end = 0
+
+    for token in _BLOCK_TOKEN.finditer(block):
+        start, end = token.span()
+
+        # close the option opened by the previous marker
+        if option_key is not None:
+            value = block[option_end:start].lstrip().strip(" :-")
+            if value:
+                options[option_key] = value
+            option_key = None
+
+        letter = token.group(1)
+
+        # "Answer:" label
+        if letter is None:
+            if answer_start is None:
+                answer_start = start
+            if answer is None:
+                match = _ANSWER_VALUE.match(block, end)
+                if match:
+                    answer = match.group(1).upper()
+            continue
+
+        # option marker
+        option_key = letter.upper()
+        option_end = end
+
+        if (
+            letter == "A"
+            and question_end is None
+            and answer_start is None
+            and (start == 0 or not _WORD_CHAR.match(block, start - 1))
+        ):
+            question_end = start
+
+    if option_key is not None:
+        value = block[option_end:].lstrip().strip(" :-")
+        if value:
+            options[option_key] = value
+
+    if question_end is None:
+        question_end = len(block) if answer_start is None else answer_start
+
+    return block[:question_end].strip(), options, answer
@@ -0,0 +1,251 @@
+# core/question_store.py
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+
+from config import QUESTION_STORE_DB, QUESTION_STORE_BATCH_SIZE
+
+
+class QuestionStore:
+    """
+    SQLite store for format_output records.
+
+    - questions: one row per record (full record kept as JSON), indexed
+      on type, difficulty and source
+    - questions_fts: FTS5 index over question and option text, kept in
+      sync by triggers
+
+    The database file is created on first use, not on construction.
+    """
+
+    def __init__(self, db_path: str = QUESTION_STORE_DB):
+        self.db_path = db_path
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    # ---------------- PUBLIC ---------------- #
+
+    def add(
+        self,
+        questions: Iterable[dict],
+        batch_size: int = QUESTION_STORE_BATCH_SIZE
+    ) -> int:
+        """
+        Insert or update records, `batch_size` per transaction.
+        Returns the number of records written.
+        """
+        written = 0
+        batch = []
+
+        with self._connect() as conn:
+            for q in questions:
+                batch.append(_to_row(q))
+                if len(batch) >= batch_size:
+                    written += self._insert(conn, batch)
+                    batch = []
+
+            if batch:
+                written += self._insert(conn, batch)
+
+        return written
+
+    def delete(self, ids: Iterable[str]) -> int:
+        ids = list(ids)
+        deleted = 0
+
+        with self._connect() as conn:
+            for start in range(0, len(ids), QUESTION_STORE_BATCH_SIZE):
+                chunk = ids[start:start + QUESTION_STORE_BATCH_SIZE]
+                with conn:
+                    deleted += conn.execute(
+                        "DELETE FROM questions WHERE id IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        chunk
+                    ).rowcount
+
+        return deleted
+
+    def get(self, question_id: str) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record FROM questions WHERE id = ?", (question_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(
+        self,
+        text: str | None = None,
+        q_type: str | None = None,
+        difficulty: str | None = None,
+        sources: list | None = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> list:
+        """
+        Filter by type / difficulty / source and full-text match `text`
+        against question and option text (all words must match, best
+        matches first)
+        """
+        tables, where, params = _filters(text, q_type, difficulty, sources)
+        order = "f.rank" if "questions_fts" in tables else "q.rowid"
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT q.record FROM {tables} {where} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def count(
+        self,
+        text: str | None = None,
+        q_type: str | None = None,
+        difficulty: str | None = None,
+        sources: list | None = None
+    ) -> int:
+        tables, where, params = _filters(text, q_type, difficulty, sources)
+
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM {tables} {where}", params
+            ).fetchone()[0]
+
+    # ---------------- INTERNAL ---------------- #
+
+    @contextmanager
+    def _connect(self):
+        if not self._ready:
+            self._init_db()
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _insert(self, conn, rows: list) -> int:
+        with conn:
+            conn.executemany(
+                "INSERT INTO questions "
+                "(id, question, options_text, type, difficulty, source, "
+                "record) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET "
+                "question = excluded.question, "
+                "options_text = excluded.options_text, "
+                "type = excluded.type, "
+                "difficulty = excluded.difficulty, "
+                "source = excluded.source, "
+                "record = excluded.record",
+                rows
+            )
+        return len(rows)
+
+    def _init_db(self):
+        with self._init_lock:
+            if self._ready:
+                return
+
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+
+            self._ready = True
+
+
+# ------------------ Helpers ------------------ #
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    options_text TEXT NOT NULL,
+    type TEXT,
+    difficulty TEXT,
+    source TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_type ON questions (type);
+CREATE INDEX IF NOT EXISTS questions_difficulty ON questions (difficulty);
+CREATE INDEX IF NOT EXISTS questions_source ON questions (source);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+    question, options_text, content='questions', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS questions_ai AFTER INSERT ON questions BEGIN
+    INSERT INTO questions_fts (rowid, question, options_text)
+    VALUES (new.rowid, new.question, new.options_text);
+END;
+CREATE TRIGGER IF NOT EXISTS questions_ad AFTER DELETE ON questions BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, question, options_text)
+    VALUES ('delete', old.rowid, old.question, old.options_text);
+END;
+CREATE TRIGGER IF NOT EXISTS questions_au AFTER UPDATE ON questions BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, question, options_text)
+    VALUES ('delete', old.rowid, old.question, old.options_text);
+    INSERT INTO questions_fts (rowid, question, options_text)
+    VALUES (new.rowid, new.question, new.options_text);
+END;
+"""
+
+_WORD = re.compile(r"\w+")
+
+
+def _to_row(q: dict) -> tuple:
+    options = q.get("options") or {}
+    return (
+        q["id"],
+        q["question"],
+        " ".join(str(value) for value in options.values()),
+        q.get("type"),
+        q.get("difficulty"),
+        q.get("source"),
+        json.dumps(q, ensure_ascii=False),
+    )
+
+
+def _filters(text, q_type, difficulty, sources) -> tuple[str, str, list]:
+    """
+    (FROM clause, WHERE clause, params) shared by search and count
+    """
+    tables = "questions q"
+    conditions = []
+    params = []
+
+    # quote every word: user input never reaches FTS5 query syntax
+    words = _WORD.findall(text or "")
+    if words:
+        # CROSS JOIN keeps the FTS match as the outer loop; otherwise the
+        # planner may walk a column index and re-run the match per row
+        tables = "questions_fts f CROSS JOIN questions q ON q.rowid = f.rowid"
+        conditions.append("questions_fts MATCH ?")
+        params.append(" ".join(f'"{word}"' for word in words))
+
+    if q_type:
+        conditions.append("q.type = ?")
+        params.append(q_type)
+
+    if difficulty:
+        conditions.append("q.difficulty = ?")
+        params.append(difficulty)
+
+    if sources:
+        conditions.append(f"q.source IN ({', '.join('?' * len(sources))})")
+        params.extend(sources)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return tables, where, params
@@ -1,6 +1,30 @@
 import re
+from typing import Iterable, Iterator
 
+from utils.metrics import timed
 
+
+# ================= PATTERNS ================= #
+
+# Page numbers like: Page 1, 1/10, - 2 -  (matched on a stripped line)
+_PAGE_NUMBER = re.compile(
+    r"\s*(?:page\s*\d+|\d+\s*/\s*\d+|-\s*\d+\s*-)\s*", re.I
+)
+
+_DIGIT = re.compile(r"\d")
+
+# OCR / extraction noise: weird unicode chars, long dot / hyphen runs
+# (literal-prefix patterns let the regex engine skip ahead quickly)
+_NOISE_CHARS = "�•►■◆"
+_DOT_DASH_RUNS = re.compile(r"\.\.\.\.+|----+")
+
+_MULTI_SPACE = re.compile(r"  +")
+
+# Option marker glued to its text: "A)Paris" -> "A) Paris"
+_OPTION_MARKER = re.compile(r"([A-D][\)\.])([^\s])")
+
+
+@timed("clean_text", counts=lambda text: {"lines": _line_count(text)})
 def clean_text(text: str) -> str:
     """
     Clean raw extracted text for question parsing
@@ -11,14 +35,25 @@ def clean_text(text: str) -> str:
         return ""
 
     text = _normalize_text(text)
-    text = _remove_headers_footers(text)
-    text = _remove_page_numbers(text)
+    text = _filter_lines(text)
     text = _remove_noise(text)
     text = _fix_spacing_safe(text)
 
     return text.strip()
 
 
+def clean_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming variant of clean_text: clean page / paragraph chunks one at
+    a time (every step is line-local) and skip chunks that end up empty
+    """
+
+    for chunk in chunks:
+        cleaned = clean_text(chunk)
+        if cleaned:
+            yield cleaned
+
+
 # ================= CLEANING STEPS ================= #
 
 def _normalize_text(text: str) -> str:
@@ -30,52 +65,39 @@ def _normalize_text(text: str) -> str:
     return text
 
 
-def _remove_headers_footers(text: str) -> str:
+def _filter_lines(text: str) -> str:
     """
-    Remove obvious headers / footers without killing content
+    Single line pass:
+    - remove obvious headers / footers without killing content
+    - remove page numbers like: Page 1, 1/10, - 2 -
+    - squeeze runs of empty lines down to one
     """
-    lines = text.split("\n")
     cleaned = []
+    previous_empty = False
 
-    for line in lines:
-        line_strip = line.strip()
-
-        # skip empty
-        if not line_strip:
-            cleaned.append(line)
+    for line in text.split("\n"):
+        if not line:
+            if not previous_empty:
+                cleaned.append(line)
+            previous_empty = True
             continue
 
-        # skip very short ALL CAPS lines with NO digits (true headers)
-        if (
-            line_strip.isupper()
-            and len(line_strip) < 30
-            and not re.search(r"\d", line_strip)
-        ):
-            continue
-
-        cleaned.append(line)
-
-    return "\n".join(cleaned)
+        line_strip = line.strip()
 
+        if line_strip:
+            # skip very short ALL CAPS lines with NO digits (true headers)
+            if (
+                line_strip.isupper()
+                and len(line_strip) < 30
+                and not _DIGIT.search(line_strip)
+            ):
+                continue
 
-def _remove_page_numbers(text: str) -> str:
-    """
-    Remove page numbers like:
-    Page 1, 1/10, - 2 -
-    """
-    patterns = [
-        r"^\s*page\s*\d+\s*$",
-        r"^\s*\d+\s*/\s*\d+\s*$",
-        r"^\s*-\s*\d+\s*-\s*$"
-    ]
+            if _PAGE_NUMBER.fullmatch(line_strip):
+                continue
 
-    lines = text.split("\n")
-    cleaned = []
-
-    for line in lines:
-        if any(re.match(p, line.strip().lower()) for p in patterns):
-            continue
         cleaned.append(line)
+        previous_empty = False
 
     return "\n".join(cleaned)
 
@@ -85,26 +107,25 @@ def _remove_noise(text: str) -> str:
     Remove OCR / extraction noise (SAFE)
     """
     # remove weird unicode chars only
-    text = re.sub(r"[�•►■◆]", " ", text)
+    for char in _NOISE_CHARS:
+        if char in text:
+            text = text.replace(char, " ")
 
     # remove long dot / hyphen runs ONLY
-    text = re.sub(r"\.{4,}", " ", text)
-    text = re.sub(r"-{4,}", " ", text)
-
-    return text
+    return _DOT_DASH_RUNS.sub(" ", text)
 
 
 def _fix_spacing_safe(text: str) -> str:
     """
     Fix spacing WITHOUT destroying MCQ structure
+    (excessive newlines are already squeezed by _filter_lines)
     """
-    # collapse multiple spaces (but keep newlines)
-    text = re.sub(r"[ \t]{2,}", " ", text)
-
-    # normalize excessive newlines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # collapse multiple spaces (tabs are gone after _normalize_text)
+    text = _MULTI_SPACE.sub(" ", text)
 
     # ensure space after option markers
-    text = re.sub(r"([A-D][\)\.])([^\s])", r"\1 \2", text)
+    return _OPTION_MARKER.sub(r"\1 \2", text)
 
-    return text
+
+def _line_count(text: str) -> int:
+    return text.count("\n") + 1 if text else 0
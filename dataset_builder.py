@@ -1,31 +1,316 @@
 # dataset_builder.py
+import glob
+import gzip
 import json
 import os
+import re
+import textwrap
+from typing import Iterable, Iterator
+
+from config import DATASET_SHARD_BYTES
 from utils.logger import logger
 
 
 def save_dataset(
-    questions: list,
+    questions: Iterable[dict],
     filename: str = "questions_dataset.json"
 ):
     """
-    Save extracted questions into a JSON dataset.
+    Save extracted questions into a dataset, one question at a time.
+    `.json` gives a JSON array, `.jsonl` / `.jsonl.gz` sharded JSON lines.
+    No questions (empty list or exhausted iterator): nothing is written
+    and an existing dataset is left as it is.
+    """
+
+    with open_dataset_writer(filename) as writer:
+        writer.write(questions)
+
+        if not writer.count:
+            writer.abort()
+            logger.warning("No questions to save")
+
+
+def load_dataset(filename: str = "questions_dataset.json") -> list:
+    """
+    Read a whole dataset into memory ([] if missing)
+    """
+    return list(iter_dataset(filename))
+
+
+def iter_dataset(filename: str = "questions_dataset.json") -> Iterator[dict]:
+    """
+    Stream questions back from a .json dataset or from every finished
+    shard of a .jsonl / .jsonl.gz one
     """
 
-    if not questions:
-        logger.warning("No questions to save")
+    if _is_jsonl(filename):
+        for path in list_shards(filename):
+            yield from iter_shard(path)
         return
 
-    # Ensure output directory
-    os.makedirs("output", exist_ok=True)
     file_path = os.path.join("output", filename)
+    if not os.path.exists(file_path):
+        return
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from json.load(f)
+
+
+def iter_shard(path: str) -> Iterator[dict]:
+    """
+    Stream one JSONL shard (shards can be read in parallel)
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def list_shards(filename: str) -> list:
+    """
+    Finished shards of a JSONL dataset, in shard order
+    """
+    stem, suffix = _split_name(filename)
+    pattern = re.compile(re.escape(stem) + r"-(\d+)" + re.escape(suffix) + "$")
+
+    shards = []
+    for path in glob.glob(os.path.join("output", f"{stem}-*{suffix}")):
+        match = pattern.match(os.path.basename(path))
+        if match:
+            shards.append((int(match.group(1)), path))
+
+    return [path for _, path in sorted(shards)]
+
+
+def dataset_stem(filename: str) -> str:
+    """
+    "questions.jsonl.gz" -> "questions"
+    """
+    return _split_name(filename)[0]
+
+
+def dataset_suffix(filename: str) -> str:
+    """
+    "questions.jsonl.gz" -> ".jsonl.gz"
+    """
+    return _split_name(filename)[1]
+
+
+def open_dataset_writer(
+    filename: str = "questions_dataset.json",
+    max_shard_bytes: int | None = DATASET_SHARD_BYTES,
+    append: bool = False
+):
+    """
+    DatasetWriter for .json, JsonlDatasetWriter for .jsonl / .jsonl.gz
+    """
+
+    if _is_jsonl(filename):
+        return JsonlDatasetWriter(filename, max_shard_bytes, append)
+
+    if append:
+        raise ValueError("Appending is only supported for .jsonl datasets")
+
+    return DatasetWriter(filename)
+
+
+class DatasetWriter:
+    """
+    Stream questions into a JSON dataset as they arrive.
+    The finished file has the same layout as save_dataset output; it is
+    written next to the target and renamed over it on close, so an
+    aborted run leaves the previous dataset untouched.
+    """
+
+    def __init__(self, filename: str = "questions_dataset.json"):
+        os.makedirs("output", exist_ok=True)
+        self.path = os.path.join("output", filename)
+        self.count = 0
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(
-            questions,
-            f,
-            indent=2,
-            ensure_ascii=False
+        self._tmp_path = f"{self.path}.tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._file.write("[")
+
+    def write(self, questions: list):
+        for q in questions:
+            item = json.dumps(q, indent=2, ensure_ascii=False)
+            self._file.write(("," if self.count else "") + "\n")
+            self._file.write(textwrap.indent(item, "  "))
+            self.count += 1
+
+        # keep the .tmp file current for anyone tailing a long run
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        logger.info(f"Dataset saved successfully at {self.path}")
+
+    def abort(self):
+        """
+        Drop everything written so far
+        """
+        if self._file.closed:
+            return
+
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+class JsonlDatasetWriter:
+    """
+    Append-only JSON lines dataset, gzip'd for .jsonl.gz, split into
+    numbered shards of about `max_shard_bytes` (uncompressed):
+    output/<stem>-00000.jsonl[.gz], output/<stem>-00001.jsonl[.gz], ...
+
+    Shards are written as .tmp files and renamed into place when finished:
+    - append=True: each one as soon as it is full, numbered after the
+      existing shards (readers can pick them up while the run goes on)
+    - append=False: all of them on close, then the previous shards are
+      removed; an aborted run leaves the old dataset untouched
+    """
+
+    def __init__(
+        self,
+        filename: str = "questions_dataset.jsonl",
+        max_shard_bytes: int | None = DATASET_SHARD_BYTES,
+        append: bool = False
+    ):
+        os.makedirs("output", exist_ok=True)
+        self.filename = filename
+        self.max_shard_bytes = max_shard_bytes
+        self.append = append
+
+        stem, suffix = _split_name(filename)
+        self.path = os.path.join("output", f"{stem}-*{suffix}")
+        self.count = 0
+        self.shards = []        # finished shards of this run
+
+        existing = list_shards(filename) if append else []
+        self._index = _shard_number(existing[-1]) + 1 if existing else 0
+        self._pending = []      # (tmp, final) waiting for close
+        self._file = None
+        self._tmp_path = None
+        self._final_path = None
+        self._bytes = 0
+        self._closed = False
+
+    def write(self, questions: Iterable[dict]):
+        for q in questions:
+            line = (json.dumps(q, ensure_ascii=False) + "\n").encode("utf-8")
+
+            if self._file is None:
+                self._open_shard()
+
+            self._file.write(line)
+            self._bytes += len(line)
+            self.count += 1
+
+            if self.max_shard_bytes and self._bytes >= self.max_shard_bytes:
+                self._finish_shard()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._file is not None:
+            self._finish_shard()
+
+        for tmp_path, path in self._pending:
+            os.replace(tmp_path, path)
+            self.shards.append(path)
+
+        if not self.append:
+            for path in list_shards(self.filename):
+                if path not in self.shards:
+                    os.remove(path)
+
+        logger.info(
+            f"Dataset saved successfully at {self.path} "
+            f"({self.count} questions, {len(self.shards)} shards)"
         )
 
-    logger.info(f"Dataset saved successfully at {file_path}")
+    def abort(self):
+        """
+        Drop unfinished shards (and, when not appending, every shard of
+        this run)
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._file is not None:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+        for tmp_path, _ in self._pending:
+            os.remove(tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+    # ---------------- INTERNAL ---------------- #
+
+    def _open_shard(self):
+        stem, suffix = _split_name(self.filename)
+        path = os.path.join("output", f"{stem}-{self._index:05d}{suffix}")
+
+        self._tmp_path = f"{path}.tmp"
+        self._final_path = path
+        opener = gzip.open if suffix.endswith(".gz") else open
+        self._file = opener(self._tmp_path, "wb")
+
+    def _finish_shard(self):
+        self._file.close()
+        self._file = None
+
+        if self.append:
+            os.replace(self._tmp_path, self._final_path)
+            self.shards.append(self._final_path)
+        else:
+            self._pending.append((self._tmp_path, self._final_path))
+
+        self._index += 1
+        self._bytes = 0
+
+
+# ------------------ Helpers ------------------ #
+
+def _is_jsonl(filename: str) -> bool:
+    return filename.endswith((".jsonl", ".jsonl.gz"))
+
+
+def _split_name(filename: str) -> tuple[str, str]:
+    """
+    "questions.jsonl.gz" -> ("questions", ".jsonl.gz")
+    """
+    for suffix in (".jsonl.gz", ".jsonl", ".json"):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], suffix
+    return os.path.splitext(filename)
+
+
+def _shard_number(path: str) -> int:
+    return int(re.search(r"-(\d+)\.jsonl", os.path.basename(path)).group(1))
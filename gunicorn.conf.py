@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+"""
+Picked up automatically by `gunicorn app:app` (run from the repo root).
+
+Format backends (PyPDF2, python-docx, pandas, OpenCV) are imported lazily
+by each worker. With PRELOAD_BACKENDS set, the master imports them before
+forking instead: workers boot faster and share those pages copy-on-write.
+"""
+import gc
+
+from config import PRELOAD_BACKENDS
+
+
+def on_starting(server):
+    if not PRELOAD_BACKENDS:
+        return
+
+    from core.extractors import preload_backends
+
+    names = PRELOAD_BACKENDS if isinstance(PRELOAD_BACKENDS, list) else None
+    timings = preload_backends(names)
+    server.log.info(
+        "Preloaded backends: " + ", ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in timings.items()
+        )
+    )
+
+    # keep the preloaded objects out of later collections, which would
+    # otherwise touch (and un-share) their pages in every worker
+    gc.freeze()
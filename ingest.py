@@ -0,0 +1,338 @@
+# ingest.py
+"""
+Build a question dataset from many files.
+
+    python ingest.py papers/ "exams/**/*.pdf" -o questions_dataset.json
+    python ingest.py papers/ -o questions.jsonl.gz --shard-mb 64
+
+Directories are walked recursively, globs are expanded, and unsupported
+files are skipped. Files are spread across a process pool. Each file's
+questions go into the dataset as soon as it finishes. A file that fails
+ends up in <dataset>.errors.json and does not stop the run.
+
+Every run writes <dataset>.manifest.json (size, mtime, content hash and
+pipeline version per source). With --incremental only new or changed
+files are processed; questions of unchanged files are carried over, those
+of changed files or files no longer among the inputs are dropped.
+
+With --store the questions are also kept in the SQLite question store
+(GET /questions), in sync with the dataset.
+
+With --dedup a second dataset <dataset stem>.dedup.<ext> is written in
+which near-duplicates are folded into one question that links every
+copy and source (nlp/dedup.py); the main dataset stays complete so
+incremental builds keep working.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import INGEST_WORKERS, DATASET_SHARD_BYTES
+from core.pipeline import extract_file, PIPELINE_FINGERPRINT
+from core.question_store import QuestionStore
+from dataset_builder import (
+    open_dataset_writer, iter_dataset, dataset_stem, dataset_suffix
+)
+from nlp.dedup import iter_deduplicated
+from utils.file_utils import is_supported_file, get_file_hash
+from utils.logger import logger
+from utils.manifest import BuildManifest, file_stat
+from utils.metrics import RequestMetrics
+
+
+def main(argv: list | None = None) -> int:
+    args = _parse_args(argv)
+
+    # 1️⃣ Collect input files (and their source names)
+    sources = collect_files(args.inputs)
+    files = list(sources)
+    if not files:
+        logger.warning("No supported files found")
+        return 1
+
+    # 2️⃣ Work out what needs processing
+    manifest = BuildManifest(
+        os.path.join("output", dataset_stem(args.output) + ".manifest.json"),
+        PIPELINE_FINGERPRINT
+    )
+    previous_ids = manifest.question_ids(list(manifest.files))
+    known_pages = manifest.page_counts()
+    if args.incremental:
+        files, keep_keys = _plan_incremental(manifest, files, args.output)
+    else:
+        manifest.files = {}
+        keep_keys = set()
+    keep_ids = {question_id for _, question_id in keep_keys}
+
+    store = QuestionStore() if args.store else None
+    added_ids = set()
+
+    total = len(files)
+    workers = min(args.workers or os.cpu_count() or 1, max(total, 1))
+    logger.info(f"Ingesting {total} files with {workers} workers")
+
+    # 3️⃣ Extract in parallel, stream questions into the dataset
+    errors = []
+    totals = {"files": 0, "pages": 0, "questions": 0}
+    start = time.perf_counter()
+
+    shard_bytes = (
+        int(args.shard_mb * 1024 * 1024) if args.shard_mb
+        else DATASET_SHARD_BYTES
+    )
+    with open_dataset_writer(args.output, shard_bytes) as writer, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        # the old dataset stays in place until the writer closes
+        if keep_keys:
+            writer.write(
+                q for q in iter_dataset(args.output)
+                if (q["source"], q["id"]) in keep_keys
+            )
+        carried = writer.count
+
+        futures = [
+            pool.submit(_process_file, path, sources[path]) for path in files
+        ]
+
+        for future in as_completed(futures):
+            result = future.result()
+            totals["files"] += 1
+
+            if result["error"]:
+                errors.append(result)
+                manifest.forget(result["path"])
+                logger.error(
+                    f"[{totals['files']}/{total}] {result['path']}: "
+                    f"{result['error']}"
+                )
+                continue
+
+            if result["pages"] is None:
+                result["pages"] = known_pages.get(result["hash"], 0)
+
+            writer.write(result["questions"])
+            if store:
+                store.add(result["questions"])
+                added_ids.update(q["id"] for q in result["questions"])
+            manifest.record(
+                result["path"], result["stat"], result["hash"],
+                result["questions"], result["source"], result["pages"]
+            )
+            totals["pages"] += result["pages"]
+            totals["questions"] += len(result["questions"])
+
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"[{totals['files']}/{total}] {result['path']}: "
+                f"{len(result['questions'])} questions, "
+                f"{result['pages']} pages, cache {result['cache']}, "
+                f"{result['seconds']:.2f}s | "
+                f"{totals['files'] / elapsed:.2f} files/s, "
+                f"{totals['pages'] / elapsed:.2f} pages/s"
+            )
+
+    # only once the dataset is in place
+    manifest.save()
+    if store:
+        store.delete(previous_ids - keep_ids - added_ids)
+
+    # 4️⃣ Near-duplicate folding over the whole dataset
+    if args.dedup:
+        dedup_name = dataset_stem(args.output) + ".dedup" + dataset_suffix(
+            args.output
+        )
+        with open_dataset_writer(dedup_name, shard_bytes) as dedup_writer:
+            dedup_writer.write(
+                iter_deduplicated(lambda: iter_dataset(args.output))
+            )
+        logger.info(
+            f"{writer.count} questions, {dedup_writer.count} after folding "
+            f"near-duplicates ({dedup_writer.path})"
+        )
+
+    # 5️⃣ Per-file error report
+    if errors:
+        report_path = os.path.join(
+            "output", dataset_stem(args.output) + ".errors.json"
+        )
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(errors, f, indent=2, ensure_ascii=False)
+        logger.warning(f"{len(errors)} files failed, see {report_path}")
+
+    # 6️⃣ Summary
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n{totals['files'] - len(errors)}/{total} files, "
+        f"{totals['pages']} pages, {totals['questions']} questions "
+        f"in {elapsed:.1f}s "
+        f"({total / elapsed:.2f} files/s, "
+        f"{totals['pages'] / elapsed:.2f} pages/s)"
+    )
+    if args.incremental:
+        print(f"{carried} questions carried over from unchanged files")
+    print(f"Dataset: {writer.path}")
+
+    return 1 if errors else 0
+
+
+def collect_files(inputs: list) -> dict:
+    """
+    Expand files, directories (recursive) and glob patterns into the
+    supported files, sorted and de-duplicated. Maps each path to its
+    source name: the path relative to the input that matched it (the
+    directory, or the fixed part of a glob), so 2023/paper1.pdf and
+    2024/paper1.pdf stay apart.
+    """
+    files = {}
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in names:
+                    path = os.path.join(root, name)
+                    files.setdefault(path, _source_name(path, item))
+        elif os.path.isfile(item):
+            files.setdefault(item, os.path.basename(item))
+        else:
+            base = _glob_root(item)
+            for path in glob.glob(item, recursive=True):
+                files.setdefault(path, _source_name(path, base))
+
+    return {
+        path: files[path] for path in sorted(files)
+        if os.path.isfile(path) and is_supported_file(path)
+    }
+
+
+# ================= HELPERS ================= #
+
+def _source_name(path: str, root: str) -> str:
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def _glob_root(pattern: str) -> str:
+    """
+    The directory part of a glob before the first wildcard
+    """
+    parts = []
+    for part in os.path.dirname(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or "."
+
+
+def _plan_incremental(
+    manifest: BuildManifest,
+    files: list,
+    dataset: str
+) -> tuple[list, list]:
+    """
+    Return (files to process, (source, id) of the questions to carry
+    over) and drop manifest entries of removed files
+    """
+    changed, unchanged, removed = manifest.changes(files)
+    for path in removed:
+        manifest.forget(path)
+
+    present = {(q["source"], q["id"]) for q in iter_dataset(dataset)}
+
+    # an unchanged file whose questions are missing from the dataset
+    # (edited / deleted by hand) is processed again
+    carried = []
+    for path in unchanged:
+        if manifest.question_keys([path]) <= present:
+            carried.append(path)
+        else:
+            changed.append(path)
+
+    logger.info(
+        f"Incremental build: {len(changed)} new or changed, "
+        f"{len(carried)} unchanged, {len(removed)} removed"
+    )
+    return sorted(changed), manifest.question_keys(carried)
+
+
+def _process_file(path: str, source: str) -> dict:
+    """
+    Worker: run one file through the pipeline as `source`, never raise.
+    Pages are counted by the extraction itself; on a cache hit there is
+    none and "pages" stays None (main() looks it up in the manifest).
+    """
+    start = time.perf_counter()
+    result = {
+        "path": path,
+        "source": source,
+        "stat": None,
+        "hash": None,
+        "questions": [],
+        "pages": None,
+        "cache": None,
+        "seconds": 0.0,
+        "error": None,
+    }
+
+    try:
+        # stat before reading: a later edit then shows up on the next run
+        result["stat"] = file_stat(path)
+        result["hash"] = get_file_hash(path)
+
+        # the file pool already uses every core: no nested PDF / OCR pools
+        with RequestMetrics().activate() as recorded:
+            questions, cache_hit = extract_file(
+                path, source=source, workers=1
+            )
+        result["questions"] = questions
+        if not cache_hit:
+            # formats without pages (txt, docx, ...) count as one
+            result["pages"] = recorded.counts.get("pages", 1)
+        result["cache"] = "hit" if cache_hit else "miss"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _parse_args(argv: list | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split("\n")[0]
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--output", default="questions_dataset.json",
+        help="dataset file name inside output/ (.json, .jsonl, .jsonl.gz)"
+    )
+    parser.add_argument(
+        "--shard-mb", type=float, default=None,
+        help="JSONL shard size in MB (default: DATASET_SHARD_BYTES)"
+    )
+    parser.add_argument(
+        "-i", "--incremental", action="store_true",
+        help="only process files that are new or changed since the last run"
+    )
+    parser.add_argument(
+        "--dedup", action="store_true",
+        help="also write a dataset with near-duplicates folded"
+    )
+    parser.add_argument(
+        "--store", action="store_true",
+        help="also write questions to the SQLite question store"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=INGEST_WORKERS,
+        help="files processed in parallel (default: CPU count)"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,57 @@
 # nlp/difficulty_estimator.py
+import re
+from functools import lru_cache
+
+from config import DIFFICULTY_MODEL_PATH
+from nlp.features import keyword_hits, word_counts, pick_labels
+from utils.metrics import timed
+
+HARD_KEYWORDS = ["explain", "analyze", "why", "how", "difference", "describe"]
+
+# substring match, like `word in question.lower()`
+_HARD = re.compile("|".join(map(re.escape, HARD_KEYWORDS)))
+
 
 def estimate_difficulty(question):
     length = len(question.split())
 
-    hard_keywords = ["explain", "analyze", "why", "how", "difference", "describe"]
-
     if length <= 8:
         return "EASY"
 
-    if any(word in question.lower() for word in hard_keywords):
+    if any(word in question.lower() for word in HARD_KEYWORDS):
         return "HARD"
 
     return "MEDIUM"
+
+
+@timed("estimate_difficulty")
+def estimate_difficulties(questions: list) -> list:
+    """
+    Batch estimate_difficulty: a trained model when DIFFICULTY_MODEL_PATH
+    is set, else the keyword rules on per-batch feature arrays
+    (nlp/features.py)
+    """
+    if not questions:
+        return []
+
+    model = _load_model()
+    if model is not None:
+        return [str(label) for label in model.predict(questions)]
+
+    lengths = word_counts(questions)
+    hard = keyword_hits([q.lower() for q in questions], _HARD)
+
+    return pick_labels(["EASY", "HARD"], [lengths <= 8, hard], "MEDIUM")
+
+
+@lru_cache(maxsize=1)
+def _load_model():
+    """
+    Loaded once per process: any pickled estimator / Pipeline (e.g.
+    TfidfVectorizer + LogisticRegression) with predict(list[str])
+    """
+    if not DIFFICULTY_MODEL_PATH:
+        return None
+
+    import joblib
+    return joblib.load(DIFFICULTY_MODEL_PATH)
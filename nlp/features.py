@@ -0,0 +1,32 @@
+# nlp/features.py
+import re
+
+import numpy as np
+
+
+def keyword_hits(lowered: list, pattern: re.Pattern) -> np.ndarray:
+    """
+    Bool per text: does `pattern` occur anywhere in it?
+    (one compiled alternation per text beats a scan of the joined batch,
+    which has to step through every match)
+    """
+    search = pattern.search
+    return np.fromiter(
+        (search(text) is not None for text in lowered),
+        dtype=bool, count=len(lowered)
+    )
+
+
+def word_counts(texts: list) -> np.ndarray:
+    return np.fromiter(
+        (len(text.split()) for text in texts), dtype=np.int64, count=len(texts)
+    )
+
+
+def pick_labels(labels: list, conditions: list, default: str) -> list:
+    """
+    First label whose condition holds, per row (np.select on label
+    indexes; much cheaper than selecting strings)
+    """
+    codes = np.select(conditions, range(len(labels)), default=len(labels))
+    return np.array(labels + [default], dtype=object)[codes].tolist()
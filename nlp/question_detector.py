@@ -8,6 +8,21 @@ QUESTION_WORDS = [
     "kya", "kyon", "kaise"
 ]
 
+# One anchored check for the line prefix:
+#   option -> A) b. ...  (never a question start)
+#   else   -> Q1. Q2) / 1. 2)
+_LINE_PREFIX = re.compile(
+    r"(?P<option>[A-Da-d][\)\.]\s)|[Qq]\d+[\.\)]|\d+[\.\)]\s"
+)
+
+# Word-level prefix trie over QUESTION_WORDS ("give reason" is a 2-level
+# path); a node holding _END completes a vocabulary entry. Tokens never
+# contain a space, so " " can't clash with a child key.
+_END = " "
+_trie = {}
+_max_chars = 0      # longest entry + its trailing space
+_max_words = 0
+
 
 def detect_questions(text: str):
     """
@@ -55,27 +70,40 @@ def is_question_start(line: str) -> bool:
 
     line_strip = line.strip()
 
-    # ❌ MCQ options must NEVER start a question
-    if re.match(r"^[A-Da-d][\)\.]\s+", line_strip):
-        return False
-
-    # Q1. Q2) Ql. (OCR safe)
-    if re.match(r"^(q[\d]+[\.\)])", line_strip.lower()):
-        return True
-
-    # 1. 2)
-    if re.match(r"^\d+[\.\)]\s+", line_strip):
-        return True
+    # ❌ MCQ options never start a question; Q1. / 1. always do
+    prefix = _LINE_PREFIX.match(line_strip)
+    if prefix:
+        return prefix.lastgroup != "option"
 
     # Question mark ONLY if it looks like a sentence
-    if line_strip.endswith("?") and len(line_strip.split()) > 3:
+    if line_strip.endswith("?") and len(line_strip.split(None, 4)) > 3:
         return True
 
     # Question words
-    if _starts_with_question_word(line_strip):
-        return True
+    return _starts_with_question_word(line_strip)
 
-    return False
+
+def question_starts(lines: list) -> list:
+    """
+    Batch variant of is_question_start: one bool per line
+    """
+
+    return [is_question_start(line) for line in lines]
+
+
+def add_question_words(words: list):
+    """
+    Extend the question-word vocabulary (e.g. more Hindi / Hinglish);
+    per-line cost depends on the number of words in the line prefix,
+    not on the vocabulary size
+    """
+
+    for word in words:
+        word = word.strip().lower()
+        if word and word not in QUESTION_WORDS:
+            QUESTION_WORDS.append(word)
+
+    _build_trie()
 
 
 def is_valid_question(text: str) -> bool:
@@ -98,13 +126,39 @@ def is_valid_question(text: str) -> bool:
 # ---------------- HELPERS ---------------- #
 
 def _starts_with_question_word(text: str) -> bool:
-    text = text.lower()
-    for word in QUESTION_WORDS:
-        if text.startswith(word + " "):
+    """
+    Does the lowercased text start with a QUESTION_WORDS entry + " "?
+    Only the first _max_chars characters are lowercased and split.
+    """
+    tokens = text[:_max_chars].lower().split(" ", _max_words)
+
+    node = _trie
+    # the last token has no " " after it, so it can't complete a match
+    for token in tokens[:-1]:
+        node = node.get(token)
+        if node is None:
+            return False
+        if _END in node:
             return True
+
     return False
 
 
+def _build_trie():
+    global _trie, _max_chars, _max_words
+
+    trie = {}
+    for word in QUESTION_WORDS:
+        node = trie
+        for token in word.split(" "):
+            node = node.setdefault(token, {})
+        node[_END] = True
+
+    _trie = trie
+    _max_chars = max(len(word) for word in QUESTION_WORDS) + 1
+    _max_words = max(len(word.split(" ")) for word in QUESTION_WORDS)
+
+
 def _normalize_text(text: str) -> str:
     """
     OCR normalization WITHOUT destroying MCQ structure
@@ -127,3 +181,6 @@ def _normalize_text(text: str) -> str:
     text = re.sub(r"\n{3,}", "\n\n", text)
 
     return text
+
+
+_build_trie()
@@ -1,32 +1,190 @@
+import hashlib
+import json
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 import pytesseract
 
+from config import (
+    OCR_CACHE_MAX_ENTRIES, OCR_CACHE_DB, OCR_CACHE_DB_MAX_ENTRIES,
+    OCR_BATCH_SIZE, OCR_BATCH_WORKERS
+)
+from utils.cache import ResultCache
+from utils.logger import logger
+from utils.metrics import timed
+
 # Explicit tesseract path (Windows fix)
 pytesseract.pytesseract.tesseract_cmd = (
     r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 )
 
+# Adaptive preprocessing policy (part of the OCR cache key)
+PREPROCESS_PARAMS = {
+    "target_text_height": 24,   # median glyph height (px) for tesseract
+    "min_scale": 0.4,
+    "max_scale": 2.5,
+    "default_scale": 1.5,       # when text height cannot be estimated
+    "scale_tolerance": 0.15,    # |scale - 1| below this -> no resize
+    "probe_max_side": 1600,     # analysis runs on a copy this size
+    "min_glyphs": 20,
+    "noise_threshold": 0.3,     # speck share above this -> denoise
+    "median_blur": 3,
+    "morph_kernel": 2,
+}
+
+TESSERACT_CONFIG = (
+    "--oem 3 "
+    "--psm 6 "
+    "-l eng "
+    "-c preserve_interword_spaces=1"
+)
+
+# tesseract ends every page of text output with this
+PAGE_SEPARATOR = "\f"
 
+# Repeated pages (same photo, shared cover pages) skip tesseract entirely
+ocr_cache = ResultCache(
+    max_entries=OCR_CACHE_MAX_ENTRIES,
+    db_path=OCR_CACHE_DB,
+    max_disk_entries=OCR_CACHE_DB_MAX_ENTRIES,
+    table="ocr"
+)
+
+
+@timed("read_image")
 def read_image(image_path: str) -> str:
     """
     Extract text from image using OCR.
     Returns raw extracted text.
     """
 
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found: {image_path}")
+    image = _load_image(_check_path(image_path))
+    return ocr_image(image)
 
-    image = _load_image(image_path)
-    processed = _preprocess_image(image)
-    text = _extract_text(processed)
 
-    return text
+@timed("read_image")
+def read_image_data(data: bytes, shape: tuple | None = None) -> str:
+    """
+    OCR an image held in memory, e.g. the scan embedded in a PDF page
+    (see decode_image_data)
+    """
+
+    return ocr_image(decode_image_data(data, shape))
+
+
+def read_images(images: list, details: bool = False) -> list:
+    """
+    OCR many images (paths or decoded BGR arrays) at once.
+    Cache misses are OCR'd OCR_BATCH_SIZE at a time in a single tesseract
+    run, with up to OCR_BATCH_WORKERS runs in parallel.
+    Returns texts in input order ({"text", "params"} dicts if `details`).
+    """
+
+    images = [
+        _load_image(_check_path(image)) if isinstance(image, str) else image
+        for image in images
+    ]
+    keys = [_cache_key(image) for image in images]
+    results = [ocr_cache.get(key) for key in keys]
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    batches = [
+        missing[start:start + OCR_BATCH_SIZE]
+        for start in range(0, len(missing), OCR_BATCH_SIZE)
+    ]
+
+    def run_batch(batch):
+        processed = [_preprocess_image(images[i]) for i in batch]
+        texts = _extract_text_batch([image for image, _ in processed])
+        return [
+            {"text": text, "params": params}
+            for text, (_, params) in zip(texts, processed)
+        ]
+
+    if batches:
+        workers = min(OCR_BATCH_WORKERS, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch, batch_results in zip(
+                batches, pool.map(run_batch, batches)
+            ):
+                for i, result in zip(batch, batch_results):
+                    results[i] = result
+                    ocr_cache.set(keys[i], result)
+                    logger.info(f"OCR preprocessing: {result['params']}")
+
+    if details:
+        return results
+    return [result["text"] for result in results]
+
+
+def decode_image_data(data: bytes, shape: tuple | None = None):
+    """
+    Decode an in-memory image to BGR.
+    `data` is an encoded image (PNG / JPEG / TIFF); if it cannot be
+    decoded and `shape` (height, width, channels) is given, it is read
+    as raw 8-bit RGB / gray pixels.
+    """
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    if image is None and shape is not None:
+        image = _raw_to_bgr(data, shape)
+
+    if image is None:
+        raise ValueError("Unable to decode image")
+
+    return image
+
+
+def decode_image_frames(data: bytes, frames: tuple | None = None) -> list:
+    """
+    Decode the frames of a multi-page image (TIFF) to BGR: all of them,
+    or only those in the [start, end) `frames` range (fewer, or none,
+    past the last frame)
+    """
+
+    args = [np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR]
+    if frames is not None:
+        args += [None, frames]
+
+    ok, images = cv2.imdecodemulti(*args)
+
+    if not ok or not images:
+        if frames is not None and frames[0] > 0:
+            return []
+        raise ValueError("Unable to decode image")
+
+    return list(images)
+
+
+def ocr_image(image, details: bool = False):
+    """
+    Preprocess + OCR an already decoded BGR image (cached).
+    Returns the text, or {"text", "params"} if `details`.
+    """
+
+    key = _cache_key(image)
+    result = ocr_cache.get(key)
+
+    if result is None:
+        processed, params = _preprocess_image(image)
+        result = {"text": _extract_text(processed), "params": params}
+        ocr_cache.set(key, result)
+        logger.info(f"OCR preprocessing: {params}")
+
+    return result if details else result["text"]
 
 
 # ------------------ Helpers ------------------ #
 
+def _check_path(path: str) -> str:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Image not found: {path}")
+    return path
+
+
 def _load_image(path: str):
     """
     Load image using OpenCV
@@ -39,35 +197,129 @@ def _load_image(path: str):
     return image
 
 
-def _preprocess_image(image):
+def _raw_to_bgr(data: bytes, shape: tuple):
     """
-    Improve image quality for OCR (MCQ / Question papers)
+    Raw 8-bit pixel buffer -> BGR image (None if sizes disagree)
+    """
+    height, width, channels = shape
+
+    if len(data) < height * width * channels or channels not in (1, 3):
+        return None
+
+    pixels = np.frombuffer(data, np.uint8, count=height * width * channels)
+    pixels = pixels.reshape(height, width, channels)
+
+    if channels == 1:
+        return cv2.cvtColor(pixels, cv2.COLOR_GRAY2BGR)
+    return cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+
+
+def _cache_key(image) -> str:
+    """
+    Hash of the pixels + preprocessing params + tesseract config
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{image.shape}{image.dtype}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    digest.update(json.dumps(PREPROCESS_PARAMS, sort_keys=True).encode())
+    digest.update(TESSERACT_CONFIG.encode())
+    return digest.hexdigest()
+
+
+def _preprocess_image(image, policy: dict = PREPROCESS_PARAMS):
+    """
+    Improve image quality for OCR (MCQ / Question papers).
+    Returns (binary image, chosen params).
     """
 
     # 1️⃣ Convert to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    # 2️⃣ Resize (OCR works better on larger text)
-    gray = cv2.resize(
-        gray, None,
-        fx=1.5, fy=1.5,
-        interpolation=cv2.INTER_CUBIC
-    )
+    # 2️⃣ Pick scale + denoising from a cheap look at the page
+    params = _choose_params(gray, policy)
 
-    # 3️⃣ Noise removal
-    gray = cv2.medianBlur(gray, 3)
+    # 3️⃣ Resize towards the target glyph height (up OR down)
+    scale = params["scale"]
+    if scale != 1.0:
+        gray = cv2.resize(
+            gray, None,
+            fx=scale, fy=scale,
+            interpolation=cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+        )
 
-    # 4️⃣ Thresholding (strong text separation)
+    # 4️⃣ Noise removal (only on noisy images)
+    if params["median_blur"]:
+        gray = cv2.medianBlur(gray, params["median_blur"])
+
+    # 5️⃣ Thresholding (strong text separation)
     thresh = cv2.threshold(
         gray, 0, 255,
         cv2.THRESH_BINARY + cv2.THRESH_OTSU
     )[1]
 
-    # 5️⃣ Morphological opening (remove small dots)
-    kernel = np.ones((2, 2), np.uint8)
-    thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
+    # 6️⃣ Morphological opening (remove small dots, noisy images only)
+    size = params["morph_kernel"]
+    if size:
+        kernel = np.ones((size, size), np.uint8)
+        thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
+
+    return thresh, params
+
+
+def _choose_params(gray, policy: dict) -> dict:
+    """
+    Estimate glyph height and speck noise from connected components of a
+    downsized Otsu binarization, and derive the preprocessing params
+    """
+
+    height, width = gray.shape
+    probe_scale = min(1.0, policy["probe_max_side"] / max(height, width))
+
+    probe = gray
+    if probe_scale < 1.0:
+        probe = cv2.resize(
+            gray, None,
+            fx=probe_scale, fy=probe_scale,
+            interpolation=cv2.INTER_AREA
+        )
+
+    # text = foreground (white) for connected components
+    binary = cv2.threshold(
+        probe, 0, 255,
+        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+    )[1]
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    stats = stats[1:]   # drop background
+
+    comp_heights = stats[:, cv2.CC_STAT_HEIGHT] / probe_scale
+    comp_areas = stats[:, cv2.CC_STAT_AREA]
 
-    return thresh
+    # glyph-sized components: not specks, not lines / pictures
+    glyphs = comp_heights[
+        (comp_heights >= 4) & (comp_heights <= height * 0.1)
+    ]
+    specks = int(np.count_nonzero(comp_areas <= 3))
+
+    text_height = None
+    scale = policy["default_scale"]
+    if len(glyphs) >= policy["min_glyphs"]:
+        text_height = float(np.median(glyphs))
+        scale = policy["target_text_height"] / text_height
+        scale = min(max(scale, policy["min_scale"]), policy["max_scale"])
+
+    if abs(scale - 1.0) < policy["scale_tolerance"]:
+        scale = 1.0
+
+    noise_ratio = specks / len(stats) if len(stats) else 0.0
+    noisy = noise_ratio > policy["noise_threshold"]
+
+    return {
+        "scale": round(scale, 3),
+        "text_height": round(text_height, 1) if text_height else None,
+        "noise_ratio": round(noise_ratio, 3),
+        "median_blur": policy["median_blur"] if noisy else 0,
+        "morph_kernel": policy["morph_kernel"] if noisy else 0,
+    }
 
 
 def _extract_text(image):
@@ -75,12 +327,38 @@ def _extract_text(image):
     Run tesseract OCR with tuned config
     """
 
-    config = (
-        "--oem 3 "
-        "--psm 6 "
-        "-l eng "
-        "-c preserve_interword_spaces=1"
-    )
-
-    text = pytesseract.image_to_string(image, config=config)
+    text = pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
     return text
+
+
+def _extract_text_batch(images: list) -> list:
+    """
+    OCR preprocessed images in ONE tesseract run (image list file input)
+    and split the output back per image. Falls back to one run per image
+    if the page count does not line up.
+    """
+
+    if len(images) == 1:
+        return [_extract_text(images[0])]
+
+    with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp:
+        paths = []
+        for n, image in enumerate(images):
+            path = os.path.join(tmp, f"{n:05d}.png")
+            cv2.imwrite(path, image)
+            paths.append(path)
+
+        list_path = os.path.join(tmp, "images.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(paths) + "\n")
+
+        output = pytesseract.image_to_string(
+            list_path, config=TESSERACT_CONFIG
+        )
+
+    pages = output.split(PAGE_SEPARATOR)
+    if len(pages) != len(images) + 1:
+        return [_extract_text(image) for image in images]
+
+    # same shape as a single-image run: text + page separator
+    return [page + PAGE_SEPARATOR for page in pages[:-1]]
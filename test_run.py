@@ -3,6 +3,8 @@ from core.text_cleaner import clean_text
 from core.question_parser import extract_questions
 from core.output_formatter import format_output
 from dataset_builder import save_dataset
+from nlp.dedup import deduplicate
+from nlp.difficulty_estimator import estimate_difficulties
 from utils.logger import logger
 
 
@@ -35,15 +37,21 @@ def main():
     for i, q in enumerate(questions, 1):
         print(f"{i}. {q['question']}")
 
-    # 5️⃣ Format questions (standard structure)
+    # 5️⃣ Score difficulty (whole batch at once) and format
+    difficulties = estimate_difficulties([q["question"] for q in questions])
+
     formatted_questions = []
-    for q in questions:
+    for q, difficulty in zip(questions, difficulties):
         formatted_questions.append(format_output( question=q["question"],
         q_type=q.get("type", "unknown"),
-        difficulty=q.get("difficulty", "unknown"),
+        difficulty=difficulty,
         source=FILE_PATH))
 
-    # 6️⃣ Save dataset
+    # 6️⃣ Fold near-duplicates (linked to their sources, not dropped)
+    formatted_questions = deduplicate(formatted_questions)
+    logger.info(f"Unique questions: {len(formatted_questions)}")
+
+    # 7️⃣ Save dataset
     save_dataset(formatted_questions, filename="questions_dataset.json")
     logger.info("Dataset saved as questions_dataset.json")
 
@@ -0,0 +1,40 @@
+# tests/test_bench_pipeline.py
+import pytest
+
+bench = pytest.importorskip("benchmarks.bench_pipeline")
+
+
+@pytest.mark.skipif(not bench._reset_peak_rss(), reason="needs /proc/self/clear_refs")
+def test_peak_rss_is_per_kind(tmp_path):
+    # a large parent peak is what a spawned child used to report
+    ballast = b"\x01" * (400 * 1024 * 1024)
+    del ballast
+    parent_peak = bench._peak_rss_mb()["self"]
+
+    small = bench.make_corpus(str(tmp_path), ["txt"], 1, 50, 0, 0.7, 0.0, 1)
+    large = bench.make_corpus(str(tmp_path), ["docx"], 1, 5000, 0, 0.7, 0.0, 1)
+
+    txt = bench.run_kind("txt", small["txt"], str(tmp_path), False, 1)
+    docx = bench.run_kind("docx", large["docx"], str(tmp_path), False, 1)
+
+    txt_rss, docx_rss = txt["peak_rss_mb"], docx["peak_rss_mb"]
+    assert txt_rss["reset"] and docx_rss["reset"]
+    assert txt_rss["self"] < parent_peak - 200
+    assert docx_rss["self"] > txt_rss["self"]
+    assert (
+        docx_rss["over_baseline"] - txt_rss["over_baseline"]
+        > bench.MIN_REGRESSION_MB
+    )
+
+
+def test_compare_flags_peak_rss_growth():
+    def result(over_baseline):
+        return {"kinds": {"txt": {
+            "stages": {},
+            "peak_rss_mb": {"self": 200.0, "over_baseline": over_baseline},
+        }}}
+
+    assert bench.compare(result(40.0), result(10.0), 0.10) == [
+        ("txt", "peak_rss", 10.0, 40.0, "MB")
+    ]
+    assert bench.compare(result(12.0), result(10.0), 0.10) == []
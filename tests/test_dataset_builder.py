@@ -0,0 +1,39 @@
+# tests/test_dataset_builder.py
+import os
+
+import pytest
+
+from dataset_builder import save_dataset, load_dataset
+
+QUESTIONS = [{"id": "1", "question": "What is 2+2?"}, {"id": "2", "question": "Why?"}]
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_dir(tmp_path, monkeypatch):
+    # datasets are written under ./output
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize("filename", ["data.json", "data.jsonl"])
+@pytest.mark.parametrize("wrap", [list, iter], ids=["list", "generator"])
+def test_save_dataset_empty_writes_nothing(filename, wrap):
+    save_dataset(wrap([]), filename)
+
+    assert not os.path.exists("output") or os.listdir("output") == []
+
+
+@pytest.mark.parametrize("filename", ["data.json", "data.jsonl"])
+@pytest.mark.parametrize("wrap", [list, iter], ids=["list", "generator"])
+def test_save_dataset_empty_keeps_existing(filename, wrap):
+    save_dataset(QUESTIONS, filename)
+    save_dataset(wrap([]), filename)
+
+    assert load_dataset(filename) == QUESTIONS
+
+
+@pytest.mark.parametrize("filename", ["data.json", "data.jsonl"])
+@pytest.mark.parametrize("wrap", [list, iter], ids=["list", "generator"])
+def test_save_dataset_writes_questions(filename, wrap):
+    save_dataset(wrap(QUESTIONS), filename)
+
+    assert load_dataset(filename) == QUESTIONS
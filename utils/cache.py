@@ -0,0 +1,155 @@
+# utils/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class ResultCache:
+    """
+    Two-tier key/value cache for JSON-serializable results.
+
+    - memory: per-process LRU bounded by `max_entries`
+    - disk (optional): SQLite file shared by every process that points at
+      the same `db_path` (e.g. all gunicorn workers), bounded by
+      `max_disk_entries` with least-recently-used eviction
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        db_path: str | None = None,
+        max_disk_entries: int | None = None,
+        table: str = "results"
+    ):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.table = table
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        if db_path:
+            self._init_db()
+
+    # ---------------- PUBLIC ---------------- #
+
+    def get(self, key: str):
+        """
+        Return the cached value or None
+        """
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+
+        if payload is None and self.db_path:
+            payload = self._db_get(key)
+            if payload is not None:
+                self._remember(key, payload)
+
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return json.loads(payload)
+
+    def set(self, key: str, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        self._remember(key, payload)
+
+        if self.db_path:
+            self._db_set(key, payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+    # ---------------- MEMORY TIER ---------------- #
+
+    def _remember(self, key: str, payload: str):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._memory[key] = payload
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ---------------- DISK TIER ---------------- #
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed "
+                f"ON {self.table} (accessed_at)"
+            )
+
+    def _db_get(self, key: str):
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                    (time.time(), key)
+                )
+                return row[0]
+        except sqlite3.Error:
+            # a broken disk tier must never break extraction
+            return None
+
+    def _db_set(self, key: str, payload: str):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} "
+                    "(key, value, accessed_at) VALUES (?, ?, ?)",
+                    (key, payload, time.time())
+                )
+                if self.max_disk_entries:
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN ("
+                        f"SELECT key FROM {self.table} "
+                        "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+        except sqlite3.Error:
+            pass
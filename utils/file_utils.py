@@ -1,10 +1,26 @@
 # utils/file_utils.py
+import hashlib
 import os
-from config import SUPPORTED_FILE_TYPES
 
 def is_supported_file(file_path):
+    """
+    Cheap pre-filter by extension (the extractor registry decides on
+    content when the file is loaded)
+    """
+    from core.extractors import supported_extensions
+
     _, ext = os.path.splitext(file_path)
-    return ext.lower() in SUPPORTED_FILE_TYPES
+    return ext.lower() in supported_extensions()
 
 def get_file_size(file_path):
     return os.path.getsize(file_path)
+
+def get_file_hash(file_path, chunk_size=1024 * 1024):
+    """
+    SHA-256 hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,138 @@
+# utils/manifest.py
+import json
+import os
+
+from utils.file_utils import get_file_hash
+
+
+class BuildManifest:
+    """
+    Record of the source files behind a dataset, for incremental builds.
+
+    Each entry is keyed on the absolute path and stores size, mtime,
+    content hash, pipeline version, the source name, the page count and
+    the ids of the questions the file produced. A file counts as
+    unchanged when its size and mtime match, or when they don't but its
+    content hash still does (touched / copied).
+    """
+
+    def __init__(self, path: str, pipeline_version: str):
+        self.path = path
+        self.pipeline_version = pipeline_version
+        self.files = {}
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    # ---------------- PUBLIC ---------------- #
+
+    def changes(self, paths: list) -> tuple[list, list, list]:
+        """
+        Split input files into (new or changed, unchanged) and list the
+        manifest paths that are no longer among the inputs (removed)
+        """
+        changed, unchanged = [], []
+
+        for path in paths:
+            if self._is_unchanged(os.path.abspath(path)):
+                unchanged.append(path)
+            else:
+                changed.append(path)
+
+        inputs = {os.path.abspath(path) for path in paths}
+        removed = [path for path in self.files if path not in inputs]
+
+        return changed, unchanged, removed
+
+    def question_ids(self, paths: list) -> set:
+        return {question_id for _, question_id in self.question_keys(paths)}
+
+    def question_keys(self, paths: list) -> set:
+        """
+        (source, id) of every question recorded for `paths`: what a
+        dataset record must match to belong to one of them
+        """
+        keys = set()
+        for path in paths:
+            entry = self.files.get(os.path.abspath(path))
+            if entry:
+                # entries written before sources were recorded match nothing
+                source = entry.get("source")
+                keys.update((source, qid) for qid in entry["questions"])
+        return keys
+
+    def page_counts(self) -> dict:
+        """
+        Recorded page count per content hash (a cache hit skips the
+        extraction that counts pages)
+        """
+        return {
+            entry["hash"]: entry["pages"]
+            for entry in self.files.values() if "pages" in entry
+        }
+
+    def record(
+        self,
+        path: str,
+        stat: dict,
+        file_hash: str,
+        questions: list,
+        source: str,
+        pages: int
+    ):
+        self.files[os.path.abspath(path)] = {
+            "size": stat["size"],
+            "mtime": stat["mtime"],
+            "hash": file_hash,
+            "pipeline": self.pipeline_version,
+            "source": source,
+            "pages": pages,
+            "questions": [q["id"] for q in questions],
+        }
+
+    def forget(self, path: str):
+        self.files.pop(os.path.abspath(path), None)
+
+    def save(self):
+        """
+        Write to a temp file and rename, so a crash never leaves half a
+        manifest behind
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"pipeline": self.pipeline_version, "files": self.files},
+                f,
+                indent=2,
+                ensure_ascii=False
+            )
+
+        os.replace(tmp_path, self.path)
+
+    # ---------------- INTERNAL ---------------- #
+
+    def _is_unchanged(self, path: str) -> bool:
+        entry = self.files.get(path)
+        if not entry or entry["pipeline"] != self.pipeline_version:
+            return False
+
+        stat = file_stat(path)
+        if stat["size"] != entry["size"]:
+            return False
+        if stat["mtime"] == entry["mtime"]:
+            return True
+
+        # same size, new mtime: only the content hash can tell
+        if get_file_hash(path) != entry["hash"]:
+            return False
+
+        entry["mtime"] = stat["mtime"]
+        return True
+
+
+def file_stat(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
@@ -0,0 +1,323 @@
+# utils/metrics.py
+"""
+Lightweight per-stage instrumentation.
+
+Functions decorated with @timed("stage") record their *self* time: time
+spent in nested timed stages is charged to those stages, so stage times
+add up instead of overlapping. Generator stages are timed per item, which
+keeps streaming pipelines (iter_file -> clean -> parse) apart as well.
+
+Every observation goes to the process-wide registry (render_prometheus,
+for /metrics) and to the RequestMetrics active in the current context,
+if any (per-response timing headers). State is per process: each
+gunicorn worker reports its own numbers.
+"""
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config import METRICS_ENABLED
+
+# histogram buckets (seconds)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+_stack = ContextVar("metrics_stack", default=None)
+_request = ContextVar("metrics_request", default=None)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram per label value (not thread safe on its
+    own, the registry lock guards it)
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label, seconds: float):
+        series = self.series.get(label)
+        if series is None:
+            series = self.series[label] = {
+                "buckets": [0] * len(self.buckets),
+                "count": 0,
+                "sum": 0.0,
+            }
+
+        index = bisect.bisect_left(self.buckets, seconds)
+        if index < len(self.buckets):
+            series["buckets"][index] += 1
+        series["count"] += 1
+        series["sum"] += seconds
+
+    def render(self, name: str, label_names: tuple) -> list:
+        lines = []
+        for label, series in sorted(self.series.items()):
+            labels = ",".join(
+                f'{key}="{_escape(value)}"'
+                for key, value in zip(label_names, label)
+            )
+            cumulative = 0
+            for bound, hits in zip(self.buckets, series["buckets"]):
+                cumulative += hits
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {series['sum']:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Stage times and item counts of one request (or any unit of work)
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self.started = time.perf_counter()
+        self._tokens = []
+
+    def start(self):
+        """
+        Collect everything recorded in the current context from now on
+        (until stop)
+        """
+        self._tokens.append(_request.set(self))
+
+    def stop(self):
+        _request.reset(self._tokens.pop())
+
+    @contextmanager
+    def activate(self):
+        """
+        start / stop around a block, e.g. a streamed response body that
+        runs after the request hooks are done
+        """
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def add(self, stage: str, seconds: float):
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+
+    def count(self, item: str, value: int):
+        self.counts[item] = self.counts.get(item, 0) + value
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value (durations in ms, slowest first)
+        """
+        parts = [
+            f"{stage};dur={entry['seconds'] * 1000:.2f}"
+            for stage, entry in sorted(
+                self.stages.items(), key=lambda item: -item[1]["seconds"]
+            )
+        ]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            "stages": {
+                stage: {
+                    "seconds": round(entry["seconds"], 6),
+                    "calls": entry["calls"],
+                }
+                for stage, entry in self.stages.items()
+            },
+            "counts": dict(self.counts),
+            "seconds": round(self.elapsed(), 6),
+        }
+
+
+# ================= REGISTRY ================= #
+
+_lock = threading.Lock()
+_stage_seconds = Histogram()
+_items = {}
+_http_seconds = Histogram()
+_http_requests = {}
+
+
+def record(stage: str, seconds: float):
+    with _lock:
+        _stage_seconds.observe((stage,), seconds)
+
+    recorder = _request.get()
+    if recorder is not None:
+        recorder.add(stage, seconds)
+
+
+def count(item: str, value: int, stage: str = ""):
+    """
+    Add to an item counter (bytes, lines, pages, questions)
+    """
+    with _lock:
+        key = (item, stage)
+        _items[key] = _items.get(key, 0) + value
+
+    recorder = _request.get()
+    if recorder is not None:
+        recorder.count(item, value)
+
+
+def record_http(endpoint: str, method: str, status: int, seconds: float):
+    with _lock:
+        key = (endpoint, method, str(status))
+        _http_requests[key] = _http_requests.get(key, 0) + 1
+        _http_seconds.observe((endpoint,), seconds)
+
+
+def render_prometheus(extra: list | None = None) -> str:
+    """
+    Text exposition format (0.0.4) of everything recorded so far.
+    `extra` adds (name, type, help, {((label, value), ...): value})
+    metrics owned elsewhere (e.g. cache stats).
+    """
+    lines = []
+
+    with _lock:
+        lines += [
+            "# HELP pipeline_stage_seconds Self time per pipeline stage",
+            "# TYPE pipeline_stage_seconds histogram",
+        ]
+        lines += _stage_seconds.render("pipeline_stage_seconds", ("stage",))
+
+        lines += [
+            "# HELP pipeline_items_total Items processed per stage",
+            "# TYPE pipeline_items_total counter",
+        ]
+        for (item, stage), value in sorted(_items.items()):
+            lines.append(
+                f'pipeline_items_total{{item="{item}",stage="{stage}"}} {value}'
+            )
+
+        lines += [
+            "# HELP http_requests_total HTTP requests handled",
+            "# TYPE http_requests_total counter",
+        ]
+        for (endpoint, method, status), value in sorted(_http_requests.items()):
+            lines.append(
+                f'http_requests_total{{endpoint="{_escape(endpoint)}",'
+                f'method="{method}",status="{status}"}} {value}'
+            )
+
+        lines += [
+            "# HELP http_request_seconds HTTP request latency",
+            "# TYPE http_request_seconds histogram",
+        ]
+        lines += _http_seconds.render("http_request_seconds", ("endpoint",))
+
+    for name, kind, help_text, series in extra or []:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series.items():
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{rendered}}} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ================= DECORATOR ================= #
+
+def timed(stage: str, counts=None):
+    """
+    Record the self time of every call as `stage`.
+    Generator functions are timed per item and recorded once, when the
+    generator finishes or is closed.
+    `counts(result)` may return {item: value} to count per call (per
+    yielded item for generator functions).
+    With METRICS_ENABLED off the function is returned unchanged.
+    """
+
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                iterator = fn(*args, **kwargs)
+                seconds = 0.0
+                totals = {}
+                try:
+                    while True:
+                        stack, frame, start = _enter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            return
+                        finally:
+                            seconds += _leave(stack, frame, start)
+
+                        if counts:
+                            for key, value in counts(item).items():
+                                totals[key] = totals.get(key, 0) + value
+                        yield item
+                finally:
+                    iterator.close()
+                    record(stage, seconds)
+                    _count_all(totals, stage)
+
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stack, frame, start = _enter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                record(stage, _leave(stack, frame, start))
+            if counts:
+                _count_all(counts(result), stage)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+# ------------------ Helpers ------------------ #
+
+def _enter() -> tuple:
+    stack = _stack.get()
+    if stack is None:
+        stack = []
+        _stack.set(stack)
+
+    # [time spent in nested stages]
+    frame = [0.0]
+    stack.append(frame)
+    return stack, frame, time.perf_counter()
+
+
+def _leave(stack: list, frame: list, start: float) -> float:
+    """
+    Close a span, charge it to the enclosing one, return its self time
+    """
+    elapsed = time.perf_counter() - start
+    stack.pop()
+    if stack:
+        stack[-1][0] += elapsed
+    return elapsed - frame[0]
+
+
+def _count_all(values: dict, stage: str):
+    for item, value in values.items():
+        count(item, value, stage)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')